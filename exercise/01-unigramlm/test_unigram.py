@@ -2,6 +2,10 @@ import io
 import math
 import argparse
 from collections import defaultdict
+try:  # Inside the `nlptut` package.
+    from . import train_unigram
+except ImportError:  # Run as a script.
+    import train_unigram
 
 EOS = '</s>'
 LAMBDA_1 = 0.95
@@ -16,6 +20,40 @@ def load_model(model_file):
             probabilities[word] = float(probability)
     return probabilities
 
+class CountProbs(object):
+    """Word probabilities normalized lazily from the raw counts.
+    It is looked up like the dict of `load_model()`, but
+    `P(word) = count(word) / total` is only computed at query time,
+    so `update()` can add new counts without re-normalizing anything.
+    """
+
+    def __init__(self, counts):
+        self.counts = counts
+        self.total = sum(counts.values())
+
+    def __getitem__(self, word):
+        count = self.counts.get(word, 0)
+        if count == 0:
+            return 0.
+        return count / self.total
+
+    def __contains__(self, word):
+        return self.counts.get(word, 0) > 0
+
+    def update(self, delta):
+        """Add a delta count table in place."""
+        for word, count in delta.items():
+            self.counts[word] += count
+            self.total += count
+
+def load_counts(count_file, delta_files=()):
+    """Load the model from a count table and its deltas (see `train_unigram.py`).
+    """
+    probabilities = CountProbs(train_unigram.load_counts(count_file))
+    for delta_file in delta_files:
+        probabilities.update(train_unigram.load_counts(delta_file))
+    return probabilities
+
 def test_unigram(probabilities, test_file):
     W = 0  # Total number of words.
     unk = 0  # Number of unknown words. (for calculating coverage.)
@@ -40,9 +78,14 @@ def test_unigram(probabilities, test_file):
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('--model-file', type=str)
+    parser.add_argument('--model-file', type=str, default=None)
+    parser.add_argument('--count-file', type=str, default=None)
+    parser.add_argument('--delta-file', type=str, nargs='*', default=[])
     parser.add_argument('--test-file', type=str)
     args = parser.parse_args()
 
-    probabilities = load_model(args.model_file)
+    if args.count_file is not None:
+        probabilities = load_counts(args.count_file, args.delta_file)
+    else:
+        probabilities = load_model(args.model_file)
     test_unigram(probabilities, args.test_file)
@@ -1,21 +1,71 @@
 import io
 import argparse
+from collections import defaultdict
 
 EOS = '</s>'
 
-def train_unigram(training_file, model_file):
-    counts = {}
-    total_count = 0
+def count_unigram(training_file, counts=None):
+    """Count the words of the training file.
+
+    Args:
+        training_file: <str> The training file path.
+        counts: <defaultdict of int> An existing count table to add to,
+                in place. A new one is made if None.
+
+    Returns:
+        The count table, word -> count.
+    """
+    if counts is None:
+        counts = defaultdict(int)
     with open(training_file, 'r') as f:
         for line in f:
             words = line.strip().split(' ')
             words.append(EOS)
             for word in words:
-                if word in counts:
-                    counts[word] += 1
-                else:
-                    counts[word] = 1
-                total_count += 1
+                counts[word] += 1
+    return counts
+
+def load_counts(count_file, counts=None):
+    """Load a count table, or add a delta table to `counts` in place.
+    Both are `WORD<tab>COUNT` lines: a delta is simply the count table of
+    the new text, so only the words it contains are listed.
+    """
+    if counts is None:
+        counts = defaultdict(int)
+    with open(count_file, 'r') as f:
+        for line in f:
+            word, count = line.rstrip('\n').split('\t')
+            counts[word] += int(count)
+    return counts
+
+def save_counts(counts, count_file):
+    out = io.StringIO()
+    for word, count in sorted(counts.items(),
+                              key=lambda x: x[1], reverse=True):
+        out.write('{}\t{}\n'.format(word, count))
+    with open(count_file, 'w') as f:
+        f.write(out.getvalue())
+
+def train_unigram(training_file, model_file, count_file=None,
+                  base_count_file=None, delta_files=()):
+    """Train the unigram model.
+    The raw counts can be kept in `count_file`, and a later run can start
+    from them (`base_count_file`) and add the counts of the new text or of
+    delta tables, instead of recounting the whole history.
+    """
+    counts = defaultdict(int)
+    if base_count_file is not None:
+        load_counts(base_count_file, counts)
+    for delta_file in delta_files:
+        load_counts(delta_file, counts)
+    if training_file is not None:
+        count_unigram(training_file, counts)
+    total_count = sum(counts.values())
+
+    if count_file is not None:
+        save_counts(counts, count_file)
+    if model_file is None:
+        return
 
     probabilities = {}
     for word, count in counts.items():
@@ -37,8 +87,16 @@ def train_unigram(training_file, model_file):
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('--training-file', type=str)
-    parser.add_argument('--model-file', type=str, default='stdout')
+    parser.add_argument('--training-file', type=str, default=None)
+    parser.add_argument('--model-file', type=str, default=None)
+    parser.add_argument('--count-file', type=str, default=None)
+    parser.add_argument('--base-count-file', type=str, default=None)
+    parser.add_argument('--delta-file', type=str, nargs='*', default=[])
     args = parser.parse_args()
 
-    train_unigram(args.training_file, args.model_file)
+    # Print the model if nothing else is asked for.
+    model_file = args.model_file
+    if model_file is None and args.count_file is None:
+        model_file = 'stdout'
+    train_unigram(args.training_file, model_file, args.count_file,
+                  args.base_count_file, args.delta_file)
@@ -1,7 +1,18 @@
 import io
+import os
+import sys
 import argparse
-import math
 from collections import defaultdict
+try:  # Inside the `nlptut` package.
+    from . import train_bigram
+except ImportError:  # Run as a script.
+    import train_bigram
+try:  # Inside the `nlptut` package.
+    from ..common.score_cache import ScoreCache, neg_log2, MAXSIZE
+except ImportError:  # Run as a script.
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 '..', 'common'))
+    from score_cache import ScoreCache, neg_log2, MAXSIZE
 
 SOS = '<s>'
 EOS = '</s>'
@@ -15,7 +26,59 @@ def load_model(model_file):
             probs[ngram] = float(prob)
     return probs
 
-def test_bigram(probs, test_file, lambda_1, lambda_2):
+class CountProbs(object):
+    """N-gram probabilities normalized lazily from the raw counts.
+    It is looked up like the dict of `load_model()`, but
+    `P(ngram) = count(ngram) / count(context)` is only computed at query time,
+    so `update()` can add new counts without re-normalizing anything.
+    """
+
+    def __init__(self, counts):
+        self.counts = counts
+        self.context_counts = train_bigram.count_context(counts)
+
+    def __getitem__(self, ngram):
+        count = self.counts.get(ngram, 0)
+        if count == 0:
+            return 0.
+        return count / self.context_counts[ngram.rpartition(' ')[0]]
+
+    def get(self, ngram, default=0.):
+        return self[ngram] if ngram in self else default
+
+    def __contains__(self, ngram):
+        return self.counts.get(ngram, 0) > 0
+
+    def update(self, delta):
+        """Add a delta count table in place."""
+        for ngram, count in delta.items():
+            self.counts[ngram] += count
+            self.context_counts[ngram.rpartition(' ')[0]] += count
+
+def load_counts(count_file, delta_files=()):
+    """Load the model from a count table and its deltas (see `train_bigram.py`).
+    """
+    probs = CountProbs(train_bigram.load_counts(count_file))
+    for delta_file in delta_files:
+        probs.update(train_bigram.load_counts(delta_file))
+    return probs
+
+def make_scorer(probs, lambda_1, lambda_2, maxsize=MAXSIZE):
+    """Cache the costs of the bigrams 'w_{i-1} w_i' across the lines.
+    The model is read with `get()`, indexing the defaultdict of
+    `load_model()` would insert every unseen n-gram into it.
+    """
+    def cost(bigram):
+        P1 = (lambda_1 * probs.get(bigram.rpartition(' ')[2], 0.) +
+              (1 - lambda_1) / V)
+        P2 = lambda_2 * probs.get(bigram, 0.) + (1 - lambda_2) * P1
+        return neg_log2(P2)
+    return ScoreCache(cost, maxsize)
+
+def test_bigram(probs, test_file, lambda_1, lambda_2, cache_size=MAXSIZE):
+    scorer = make_scorer(probs, lambda_1, lambda_2, cache_size)
+    # The cost of an unknown word after an unknown bigram never changes.
+    unk_cost = neg_log2((1 - lambda_2) * ((1 - lambda_1) / V))
     W = 0  # Total number of words.
     H = 0  # Negative log likelihood.
     with open(test_file, 'r') as f:
@@ -24,20 +87,28 @@ def test_bigram(probs, test_file, lambda_1, lambda_2):
             words.insert(0, SOS)
             words.append(EOS)
             for i in range(1, len(words)):
-                P1 = lambda_1 * probs[words[i]] + (1 - lambda_1) / V
-                P2 = lambda_2 * probs[' '.join(words[i-1:i+1])] + \
-                     (1 - lambda_2) * P1
-                H += - math.log2(P2)
+                bigram = ' '.join(words[i-1:i+1])
+                if words[i] in probs or bigram in probs:
+                    H += scorer(bigram)
+                else:
+                    H += unk_cost
                 W += 1
     print('Entropy: {}'.format(H/W))
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('--model-file', type=str)
+    parser.add_argument('--model-file', type=str, default=None)
+    parser.add_argument('--count-file', type=str, default=None)
+    parser.add_argument('--delta-file', type=str, nargs='*', default=[])
     parser.add_argument('--test-file', type=str)
     parser.add_argument('--lambda-1', type=float)
     parser.add_argument('--lambda-2', type=float)
+    parser.add_argument('--cache-size', type=int, default=MAXSIZE)
     args = parser.parse_args()
 
-    probs = load_model(args.model_file)
-    test_bigram(probs, args.test_file, args.lambda_1, args.lambda_2)
+    if args.count_file is not None:
+        probs = load_counts(args.count_file, args.delta_file)
+    else:
+        probs = load_model(args.model_file)
+    test_bigram(probs, args.test_file, args.lambda_1, args.lambda_2,
+                args.cache_size)
@@ -5,21 +5,80 @@ from collections import defaultdict
 SOS = '<s>'
 EOS = '</s>'
 
-def train_bigram(training_file, model_file):
-    counts = defaultdict(int)
-    context_counts = defaultdict(int)
+def count_bigram(training_file, counts=None):
+    """Count the unigrams and bigrams of the training file.
+
+    Args:
+        training_file: <str> The training file path.
+        counts: <defaultdict of int> An existing count table to add to,
+                in place. A new one is made if None.
+
+    Returns:
+        The count table, 'w_{i-1} w_i' and 'w_i' -> count.
+    """
+    if counts is None:
+        counts = defaultdict(int)
     with open(training_file, 'r') as f:
         for line in f:
             token = line.strip().split(' ')
             token.insert(0, SOS)
             token.append(EOS)
             for i in range(1, len(token)): # starting at 1, after <s>
-                # Add bigram and bigram context.
                 counts[' '.join(token[i-1:i+1])] += 1  # Number of 'w_i, w_{i-1}'
-                context_counts[token[i-1]] += 1  # Number of w_{i-1}.
-                # Add unigram and unigram context.
                 counts[token[i]] += 1  # Number of w_i.
-                context_counts[''] += 1  # Total number of words.
+    return counts
+
+def count_context(counts):
+    """Derive the context counts from the n-gram counts: every n-gram adds
+    its count to its context, and every unigram to the empty context
+    (the total number of words).
+    """
+    context_counts = defaultdict(int)
+    for ngram, count in counts.items():
+        context_counts[ngram.rpartition(' ')[0]] += count
+    return context_counts
+
+def load_counts(count_file, counts=None):
+    """Load a count table, or add a delta table to `counts` in place.
+    Both are `NGRAM<tab>COUNT` lines: a delta is simply the count table of
+    the new text, so only the n-grams it contains are listed.
+    """
+    if counts is None:
+        counts = defaultdict(int)
+    with open(count_file, 'r') as f:
+        for line in f:
+            ngram, count = line.rstrip('\n').split('\t')
+            counts[ngram] += int(count)
+    return counts
+
+def save_counts(counts, count_file):
+    out = io.StringIO()
+    for ngram, count in sorted(counts.items(),
+                               key=lambda x: x[1], reverse=True):
+        out.write('{}\t{}\n'.format(ngram, count))
+    with open(count_file, 'w') as f:
+        f.write(out.getvalue())
+
+def train_bigram(training_file, model_file, count_file=None,
+                 base_count_file=None, delta_files=()):
+    """Train the bigram model.
+    The raw counts can be kept in `count_file`, and a later run can start
+    from them (`base_count_file`) and add the counts of the new text or of
+    delta tables, instead of recounting the whole history.
+    """
+    counts = defaultdict(int)
+    if base_count_file is not None:
+        load_counts(base_count_file, counts)
+    for delta_file in delta_files:
+        load_counts(delta_file, counts)
+    if training_file is not None:
+        count_bigram(training_file, counts)
+    context_counts = count_context(counts)
+
+    if count_file is not None:
+        save_counts(counts, count_file)
+    if model_file is None:
+        return
 
     probabilities = {}
     for ngram, count in sorted(counts.items(),
@@ -46,8 +105,16 @@ def train_bigram(training_file, model_file):
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('--training-file', type=str)
-    parser.add_argument('--model-file', type=str, default='stdout')
+    parser.add_argument('--training-file', type=str, default=None)
+    parser.add_argument('--model-file', type=str, default=None)
+    parser.add_argument('--count-file', type=str, default=None)
+    parser.add_argument('--base-count-file', type=str, default=None)
+    parser.add_argument('--delta-file', type=str, nargs='*', default=[])
     args = parser.parse_args()
 
-    train_bigram(args.training_file, args.model_file)
+    # Print the model if nothing else is asked for.
+    model_file = args.model_file
+    if model_file is None and args.count_file is None:
+        model_file = 'stdout'
+    train_bigram(args.training_file, model_file, args.count_file,
+                 args.base_count_file, args.delta_file)
@@ -0,0 +1,97 @@
+import io
+import math
+import time
+import argparse
+try:  # Inside the `nlptut` package.
+    from . import word_segmentation
+except ImportError:  # Run as a script.
+    import word_segmentation
+INF = word_segmentation.INF
+LAMBDA_1 = word_segmentation.LAMBDA_1
+LAMBDA_UNK = word_segmentation.LAMBDA_UNK
+V = word_segmentation.V
+
+def forward_baseline(probs_uni, line):
+    """`word_segmentation.forward()` before the score cache: every
+    substring is smoothed and `-math.log2`'d again.
+    """
+    best_edge = {}
+    best_score = {}
+    best_edge[0] = None
+    best_score[0] = 0.
+    for word_end in range(1, len(line) + 1):
+        best_score[word_end] = INF
+        for word_begin in range(0, word_end):
+            word = line[word_begin:word_end]
+            prob = LAMBDA_UNK / V
+            if word in probs_uni:
+                prob += LAMBDA_1 * probs_uni[word]
+            my_score = best_score[word_begin] + (-math.log2(prob))
+            if my_score < best_score[word_end]:
+                best_score[word_end] = my_score
+                best_edge[word_end] = (word_begin, word_end)
+    return best_edge
+
+def time_lines(setup, lines, repeat):
+    """The best time of `repeat` runs over the lines. `setup()` is called
+    before each run and returns the forward function and its score cache,
+    so the cache statistics are those of a single run.
+    """
+    best = None
+    for _ in range(repeat):
+        forward, scorer = setup()
+        begin = time.perf_counter()
+        for line in lines:
+            forward(line)
+        elapsed = time.perf_counter() - begin
+        best = elapsed if best is None else min(best, elapsed)
+    return best, scorer
+
+def benchmark_ws(model_file, test_files, output_file, cache_sizes, repeat=5):
+    """Compare the segmentation speed with different score cache sizes
+    (0 disables the cache) on each test file, against the baseline
+    without any precomputed cost.
+    """
+    probs_uni = word_segmentation.load_model(model_file)
+
+    # Write the report into a buffer.
+    out = io.StringIO()
+    out.write('file\tcache\tsec\tspeedup\thits\tmisses\thit_rate\n')
+    for test_file in test_files:
+        with open(test_file, 'r') as f:
+            lines = [line.strip() for line in f]
+        baseline, _ = time_lines(
+            lambda: (lambda line: forward_baseline(probs_uni, line), None),
+            lines, repeat)
+        out.write('{}\tbaseline\t{:.4f}\t1.00x\t-\t-\t-\n'.format(
+            test_file, baseline))
+        for cache_size in cache_sizes:
+            def setup():
+                scorer = word_segmentation.make_scorer(probs_uni, cache_size)
+                return (lambda line: word_segmentation.forward(
+                    probs_uni, line, scorer)), scorer
+            best, scorer = time_lines(setup, lines, repeat)
+            stats = scorer.stats()
+            out.write('{}\t{}\t{:.4f}\t{:.2f}x\t{}\t{}\t{:.2%}\n'.format(
+                test_file, cache_size, best, baseline / best,
+                stats['hits'], stats['misses'], stats['hit_rate']))
+
+    # Print on the screen or save in the file.
+    if output_file == 'stdout':
+        print(out.getvalue().strip())
+    else:
+        with open(output_file, 'w') as f:
+            f.write(out.getvalue().strip())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model-file', type=str)
+    parser.add_argument('--test-files', type=str, nargs='+')
+    parser.add_argument('--output-file', type=str, default='stdout')
+    parser.add_argument('--cache-sizes', type=int, nargs='+',
+                        default=[0, 1024, word_segmentation.MAXSIZE])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    benchmark_ws(args.model_file, args.test_files, args.output_file,
+                 args.cache_sizes, args.repeat)
@@ -1,7 +1,14 @@
 import io
+import os
+import sys
 import argparse
-import math
 from collections import defaultdict
+try:  # Inside the `nlptut` package.
+    from ..common.score_cache import ScoreCache, neg_log2, MAXSIZE
+except ImportError:  # Run as a script.
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 '..', 'common'))
+    from score_cache import ScoreCache, neg_log2, MAXSIZE
 
 SOS = '<s>'
 EOS = '</s>'
@@ -9,6 +16,7 @@ INF = 1e15  # A very large number.
 LAMBDA_1 = 0.95
 LAMBDA_UNK = 1 - LAMBDA_1
 V = 1e210  # Vocabulary size. This value should be set very large for CJK langs!
+UNK_COST = neg_log2(LAMBDA_UNK / V)  # The same for every unknown substring.
 
 def load_model(model_file):
     probs = defaultdict(float)
@@ -18,7 +26,16 @@ def load_model(model_file):
             probs[word] = float(prob)
     return probs
 
-def forward(probs_uni, line):
+def make_scorer(probs_uni, maxsize=MAXSIZE):
+    """Cache the costs of the known words, shared by all the lines.
+    """
+    return ScoreCache(lambda word: neg_log2(LAMBDA_UNK / V +
+                                            LAMBDA_1 * probs_uni[word]),
+                      maxsize)
+
+def forward(probs_uni, line, scorer=None):
+    if scorer is None:
+        scorer = make_scorer(probs_uni, 0)
     best_edge = {}
     best_score = {}
     best_edge[0] = None
@@ -27,10 +44,10 @@ def forward(probs_uni, line):
         best_score[word_end] = INF
         for word_begin in range(0, word_end):
             word = line[word_begin:word_end]  # Get the substring.
-            prob = LAMBDA_UNK / V
             if word in probs_uni:
-                prob += LAMBDA_1 * probs_uni[word]
-            my_score = best_score[word_begin] + (-math.log2(prob))
+                my_score = best_score[word_begin] + scorer(word)
+            else:
+                my_score = best_score[word_begin] + UNK_COST
             if my_score < best_score[word_end]:
                 best_score[word_end] = my_score
                 best_edge[word_end] = (word_begin, word_end)
@@ -47,12 +64,13 @@ def backward(best_edge, line):
     words.reverse()
     return words
 
-def word_segmentation(probs_uni, test_file, output_file):
+def word_segmentation(probs_uni, test_file, output_file, cache_size=MAXSIZE):
+    scorer = make_scorer(probs_uni, cache_size)
     line_ws = []
     with open(test_file, 'r') as f:
         for line in f:
             line = line.strip()
-            best_edge = forward(probs_uni, line)
+            best_edge = forward(probs_uni, line, scorer)
             words = backward(best_edge, line)
             line_ws.append(' '.join(words))
 
@@ -72,7 +90,9 @@ if __name__ == '__main__':
     parser.add_argument('--model-file', type=str)
     parser.add_argument('--test-file', type=str)
     parser.add_argument('--output-file', type=str, default='stdout')
+    parser.add_argument('--cache-size', type=int, default=MAXSIZE)
     args = parser.parse_args()
 
     probs_uni = load_model(args.model_file)
-    word_segmentation(probs_uni, args.test_file, args.output_file)
+    word_segmentation(probs_uni, args.test_file, args.output_file,
+                      args.cache_size)
@@ -1,6 +1,5 @@
 import random
 import argparse
-import numpy as np
 
 SOS = '<s>'
 EOS = '</s>'
@@ -55,6 +54,7 @@ def random_sample(model_file):
     Returns:
         A funny word sequence. :-)
     """
+    import numpy as np  # Only needed for sampling, load it lazily.
     trans_prob, emiss_prob = load_model(model_file)
     output_seq = []
     next_tag = random.sample(emiss_prob.keys(), 1)[0]  # Initialize.
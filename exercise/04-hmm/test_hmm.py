@@ -1,12 +1,21 @@
 import io
+import os
+import sys
 import argparse
 import math
 from collections import defaultdict
+try:  # Inside the `nlptut` package.
+    from ..common.score_cache import ScoreCache, neg_log2, MAXSIZE
+except ImportError:  # Run as a script.
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 '..', 'common'))
+    from score_cache import ScoreCache, neg_log2, MAXSIZE
 
 SOS = '<s>'
 EOS = '</s>'
 N = 1e6
 LAMBDA = 0.95
+UNK_EMISS_COST = neg_log2((1 - LAMBDA) * 1 / N)  # For every unknown word.
 
 def load_model(model_file):
     """Load the model from the file.
@@ -62,6 +71,26 @@ def prob_emiss(key, model):
     """
     return LAMBDA * model[key] + (1 - LAMBDA) * 1 / N
 
+def make_scorers(transition, emission, maxsize=MAXSIZE):
+    """Cache the costs -log2(P) of the transitions and the emissions,
+    shared by all the lines.
+
+    Returns:
+        A tuple of two <ScoreCache>, for the transitions and the emissions.
+    """
+    trans_cost = ScoreCache(
+        lambda key: neg_log2(prob_trans(key, transition)), maxsize)
+    emiss_cost = ScoreCache(
+        lambda key: neg_log2(prob_emiss(key, emission)), maxsize)
+    return trans_cost, emiss_cost
+
+def emission_cost(key, emission, emiss_cost):
+    """The emission cost, without filling the cache with unknown words.
+    """
+    if key in emission:
+        return emiss_cost(key)
+    return UNK_EMISS_COST
+
 def forward_neubig(transition, emission, possible_tags, line):
     """The forward process of the Viterbi algorithm,
     described in Neubig's slides p.42.
@@ -121,7 +150,7 @@ def forward_neubig(transition, emission, possible_tags, line):
 
     return best_edge
 
-def forward(transition, emission, possible_tags, line):
+def forward(transition, emission, possible_tags, line, scorers=None):
     """The forward process of the Viterbi algorithm,
     described in Neubig's slides p.38-40.
     Notice: Maybe this version of `forward()` is more easy for understanding.
@@ -131,10 +160,14 @@ def forward(transition, emission, possible_tags, line):
         emission: <dict>
         possible_tags: <dict>
         line: <str> A line of the file.
+        scorers: <tuple> The cost caches made by `make_scorers()`.
 
     Returns:
         The best edges <dict> derived from the forward process.
     """
+    if scorers is None:
+        scorers = make_scorers(transition, emission, 0)
+    trans_cost, emiss_cost = scorers
     # Remove the SOS (default <s>) from the possible tags.
     if SOS in possible_tags:
         possible_tags.pop(SOS)
@@ -157,9 +190,8 @@ def forward(transition, emission, possible_tags, line):
             trans_key = '{} {}'.format(prev, next)
             emiss_key = '{} {}'.format(next, words[0])
             if prev_key in best_score and trans_key in transition:
-                score = best_score[prev_key] + \
-                        -math.log2(prob_trans(trans_key, transition)) + \
-                        -math.log2(prob_emiss(emiss_key, emission))
+                score = best_score[prev_key] + trans_cost(trans_key) + \
+                        emission_cost(emiss_key, emission, emiss_cost)
                 if next_key not in best_score or best_score[next_key] > score:
                     best_score[next_key] = score
                     best_edge[next_key] = prev_key
@@ -173,9 +205,8 @@ def forward(transition, emission, possible_tags, line):
                 trans_key = '{} {}'.format(prev, next)
                 emiss_key = '{} {}'.format(next, words[i])
                 if prev_key in best_score and trans_key in transition:
-                    score = best_score[prev_key] + \
-                            -math.log2(prob_trans(trans_key, transition)) + \
-                            -math.log2(prob_emiss(emiss_key, emission))
+                    score = best_score[prev_key] + trans_cost(trans_key) + \
+                            emission_cost(emiss_key, emission, emiss_cost)
                     if next_key not in best_score or best_score[next_key] > score:
                         best_score[next_key] = score
                         best_edge[next_key] = prev_key
@@ -188,8 +219,7 @@ def forward(transition, emission, possible_tags, line):
             trans_key = '{} {}'.format(prev, next)
             emiss_key = '{} {}'.format(next, EOS)
             if prev_key in best_score and trans_key in transition:
-                score = best_score[prev_key] + \
-                        -math.log2(prob_trans(trans_key, transition))
+                score = best_score[prev_key] + trans_cost(trans_key)
                 if next_key not in best_score or best_score[next_key] > score:
                     best_score[next_key] = score
                     best_edge[next_key] = prev_key
@@ -217,15 +247,24 @@ def backward(best_edge, line):
     tags.reverse()
     return tags
 
-def test_hmm(model_file, test_file, output_file):
-    transition, emission, possible_tags = load_model(model_file)
+def test_hmm(model_file, test_file, output_file, cache_size=MAXSIZE,
+             model=None):
+    """Tag all the lines of the test file.
+    An already loaded `model` (as returned by `load_model()`) can be given
+    instead of reading `model_file` again.
+    """
+    if model is None:
+        model = load_model(model_file)
+    transition, emission, possible_tags = model
+    scorers = make_scorers(transition, emission, cache_size)
 
     # Write the pos tags into a buffer.
     out = io.StringIO()
 
     with open(test_file, 'r') as f:
         for line in f:
-            best_edge = forward(transition, emission, possible_tags, line)
+            best_edge = forward(transition, emission, possible_tags, line,
+                                scorers)
             tags = backward(best_edge, line)
             out.write(' '.join(tags) + '\n')
 
@@ -241,6 +280,8 @@ if __name__ == '__main__':
     parser.add_argument('--model-file', type=str)
     parser.add_argument('--test-file', type=str)
     parser.add_argument('--output-file', type=str, default='stdout')
+    parser.add_argument('--cache-size', type=int, default=MAXSIZE)
     args = parser.parse_args()
 
-    test_hmm(args.model_file, args.test_file, args.output_file)
+    test_hmm(args.model_file, args.test_file, args.output_file,
+             args.cache_size)
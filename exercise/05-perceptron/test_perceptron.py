@@ -1,7 +1,10 @@
 import io
 import argparse
 from collections import defaultdict
-import train_perceptron
+try:  # Inside the `nlptut` package.
+    from . import train_perceptron
+except ImportError:  # Run as a script.
+    import train_perceptron
 
 def load_model(model_file):
     """Load the model from file.
@@ -13,11 +16,13 @@ def load_model(model_file):
             w[name] = float(value)
     return w
 
-def test_perceptron(model_file, test_file, output_file):
+def test_perceptron(model_file, test_file, output_file, w=None):
     """Predict all on the test file with a trained model.
     (Described in Neubig's slides p.12.)
+    The weights `w` can be given instead of reading `model_file` again.
     """
-    w = load_model(model_file)
+    if w is None:
+        w = load_model(model_file)
 
     # Write the result into a buffer.
     out = io.StringIO()
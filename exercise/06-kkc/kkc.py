@@ -0,0 +1,171 @@
+import io
+import math
+import argparse
+
+SOS = '<s>'
+EOS = '</s>'
+V = 1e6  # Vocabulary size.
+LAMBDA_1 = 0.95
+LAMBDA_2 = 0.95
+BEAM = 0  # States kept per position, 0 for no pruning.
+
+def load_lm(lm_file):
+    """Load the bigram language model trained by `train_bigram.py`.
+    Each line is `NGRAM<tab>PROB`, where NGRAM is one word or two words.
+
+    Args:
+        lm_file: <str> The language model file path.
+
+    Returns:
+        A <dict> of the n-gram probabilities. A plain dict, so that looking
+        up the unseen n-grams of a long input does not grow it.
+    """
+    probs = {}
+    with open(lm_file, 'r') as f:
+        for line in f:
+            ngram, prob = line.rstrip('\n').split('\t')
+            probs[ngram] = float(prob)
+    return probs
+
+def load_tm(tm_file):
+    """Load the translation model, in the emission format of `train_hmm.py`
+    (trained on `*.pron_word`). Only the lines `E WORD PRON PROB` are used,
+    so a whole HMM model file can be given.
+
+    Args:
+        tm_file: <str> The translation model file path.
+
+    Returns:
+        A pronunciation-prefix trie <dict of dicts>. Each node maps the next
+        character to a child node, and the key `None` holds the list of
+        (word, -log2 P(pron|word)) whose pronunciation ends at the node.
+    """
+    trie = {}
+    with open(tm_file, 'r') as f:
+        for line in f:
+            type, word, pron, prob = line.rstrip('\n').split(' ')
+            if type != 'E':
+                continue
+            node = trie
+            for char in pron:
+                node = node.setdefault(char, {})
+            node.setdefault(None, []).append((word, -math.log2(float(prob))))
+    return trie
+
+def lm_score(probs, prev, word):
+    """The smoothed bigram cost -log2 P(word|prev), as in `test_bigram.py`.
+    """
+    p1 = LAMBDA_1 * probs.get(word, 0.) + (1 - LAMBDA_1) / V
+    p2 = LAMBDA_2 * probs.get(prev + ' ' + word, 0.) + (1 - LAMBDA_2) * p1
+    return -math.log2(p2)
+
+def candidates(trie, line, begin):
+    """Find the words whose pronunciation starts at `begin`, walking down
+    the trie along the line instead of trying every substring.
+
+    Yields:
+        Tuples of (end, word, translation cost).
+    """
+    node = trie
+    found_single = False
+    for end in range(begin + 1, len(line) + 1):
+        node = node.get(line[end - 1])
+        if node is None:
+            break
+        for word, tm_cost in node.get(None, ()):
+            if end == begin + 1:
+                found_single = True
+            yield end, word, tm_cost
+    # An unknown character is converted into itself.
+    if not found_single:
+        yield begin + 1, line[begin], 0.
+
+def forward(probs, trie, line, beam=BEAM):
+    """The forward process of the Viterbi algorithm.
+    The state is (position, last word), and only the best score of each
+    state is kept.
+
+    Args:
+        probs: <dict> The bigram language model.
+        trie: <dict> The pronunciation-prefix trie of the translation model.
+        line: <str> A line of pronunciations.
+        beam: <int> States kept per position, 0 for no pruning.
+
+    Returns:
+        The best edges <list of dict>. `best_edge[j][word]` is the previous
+        state (position, word) of the best path ending with `word` at `j`.
+    """
+    n = len(line)
+    best_score = [{} for _ in range(n + 2)]
+    best_edge = [{} for _ in range(n + 2)]
+    best_score[0][SOS] = 0.
+    best_edge[0][SOS] = None
+    for begin in range(n):
+        states = best_score[begin]
+        if not states:
+            continue
+        if beam > 0 and len(states) > beam:
+            states = dict(sorted(states.items(), key=lambda x: x[1])[:beam])
+        for end, word, tm_cost in candidates(trie, line, begin):
+            scores = best_score[end]
+            for prev, prev_score in states.items():
+                score = prev_score + tm_cost + lm_score(probs, prev, word)
+                if word not in scores or score < scores[word]:
+                    scores[word] = score
+                    best_edge[end][word] = (begin, prev)
+
+    # Make the sentence end.
+    for prev, prev_score in best_score[n].items():
+        score = prev_score + lm_score(probs, prev, EOS)
+        if EOS not in best_score[n + 1] or score < best_score[n + 1][EOS]:
+            best_score[n + 1][EOS] = score
+            best_edge[n + 1][EOS] = (n, prev)
+    return best_edge
+
+def backward(best_edge, line):
+    """The backward process of the Viterbi algorithm.
+
+    Returns:
+        The word sequence.
+    """
+    words = []
+    next_edge = best_edge[len(line) + 1][EOS]
+    while next_edge != (0, SOS):
+        position, word = next_edge
+        words.append(word)
+        next_edge = best_edge[position][word]
+    words.reverse()
+    return words
+
+def kkc(lm_file, tm_file, test_file, output_file, beam=BEAM):
+    probs = load_lm(lm_file)
+    trie = load_tm(tm_file)
+
+    # Write the converted lines into a buffer.
+    out = io.StringIO()
+
+    with open(test_file, 'r') as f:
+        for line in f:
+            line = line.strip()
+            best_edge = forward(probs, trie, line, beam)
+            words = backward(best_edge, line)
+            out.write(' '.join(words) + '\n')
+
+    # Print on the screen or save in the file.
+    if output_file == 'stdout':
+        print(out.getvalue().strip())
+    else:
+        with open(output_file, 'w') as f:
+            f.write(out.getvalue().strip())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lm-file', type=str)
+    parser.add_argument('--tm-file', type=str)
+    parser.add_argument('--test-file', type=str)
+    parser.add_argument('--output-file', type=str, default='stdout')
+    parser.add_argument('--beam', type=int, default=BEAM)
+    args = parser.parse_args()
+
+    kkc(args.lm_file, args.tm_file, args.test_file, args.output_file,
+        args.beam)
@@ -0,0 +1,64 @@
+import io
+import argparse
+import numpy as np
+
+TOP_N = 10
+
+def load_model(model_file):
+    """Load the embeddings saved by `train_word2vec.py`.
+
+    Returns:
+        A tuple of the words <list> and the L2-normalized embeddings
+        <np.ndarray>.
+    """
+    words = []
+    vectors = []
+    with open(model_file, 'r') as f:
+        next(f)  # Skip the `V D` header.
+        for line in f:
+            word, *values = line.rstrip('\n').split(' ')
+            words.append(word)
+            vectors.append([float(x) for x in values])
+    vectors = np.array(vectors)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return words, vectors / np.maximum(norms, 1e-10)
+
+def test_word2vec(model_file, test_file, output_file, top_n=TOP_N):
+    """Find the nearest neighbours (by cosine similarity) of each word of
+    the test file, all the queries of a line in one matrix product.
+    """
+    words, vectors = load_model(model_file)
+    word_ids = {w: i for i, w in enumerate(words)}
+
+    # Write the neighbours into a buffer.
+    out = io.StringIO()
+
+    with open(test_file, 'r') as f:
+        for line in f:
+            queries = [w for w in line.strip().split(' ') if w in word_ids]
+            if not queries:
+                continue
+            sims = vectors[[word_ids[w] for w in queries]] @ vectors.T
+            for query, row in zip(queries, sims):
+                row[word_ids[query]] = -np.inf
+                best = np.argsort(-row)[:top_n]
+                out.write('{}\t{}\n'.format(query, ' '.join(
+                    '{}:{:.3f}'.format(words[i], row[i]) for i in best)))
+
+    # Print on the screen or save in the file.
+    if output_file == 'stdout':
+        print(out.getvalue().strip())
+    else:
+        with open(output_file, 'w') as f:
+            f.write(out.getvalue().strip())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model-file', type=str)
+    parser.add_argument('--test-file', type=str)
+    parser.add_argument('--output-file', type=str, default='stdout')
+    parser.add_argument('--top-n', type=int, default=TOP_N)
+    args = parser.parse_args()
+
+    test_word2vec(args.model_file, args.test_file, args.output_file,
+                  args.top_n)
@@ -0,0 +1,252 @@
+import io
+import argparse
+import multiprocessing as mp
+from collections import defaultdict
+import numpy as np
+
+EOS = '</s>'
+UNK = '<unk>'
+DIM = 100  # Embedding size.
+WINDOW = 5
+NEGATIVE = 5  # Negative samples per context word.
+BATCH_SIZE = 256
+EPOCHS = 5
+LR = 0.025
+MIN_COUNT = 1
+SAMPLE = 1e-3  # Sub-sampling threshold of frequent words, 0 to disable.
+TABLE_POWER = 0.75
+
+def build_vocab(training_file, min_count=MIN_COUNT):
+    """Count the words and give them IDs, the most frequent first.
+    Lines are tokenized as in the LM scripts: split by spaces and end with
+    `</s>`. Words seen less than `min_count` times are mapped to `<unk>`.
+
+    Args:
+        training_file: <str> The training file path.
+        min_count: <int>
+
+    Returns:
+        A tuple of the word IDs <dict> and the counts <np.ndarray> by ID.
+    """
+    counts = defaultdict(int)
+    with open(training_file, 'r') as f:
+        for line in f:
+            words = line.strip().split(' ')
+            words.append(EOS)
+            for word in words:
+                counts[word] += 1
+    unk = sum(c for c in counts.values() if c < min_count)
+    kept = sorted(((w, c) for w, c in counts.items() if c >= min_count),
+                  key=lambda x: (-x[1], x[0]))
+    if unk:
+        kept.append((UNK, unk))
+    word_ids = {w: i for i, (w, _) in enumerate(kept)}
+    return word_ids, np.array([c for _, c in kept], dtype=np.int64)
+
+def load_corpus(training_file, word_ids):
+    """Turn the training file into word IDs.
+
+    Returns:
+        A tuple of <np.ndarray>: the word IDs and the sentence ID of each word.
+    """
+    ids = []
+    sents = []
+    unk = word_ids.get(UNK)
+    with open(training_file, 'r') as f:
+        for i, line in enumerate(f):
+            words = line.strip().split(' ')
+            words.append(EOS)
+            for word in words:
+                ids.append(word_ids.get(word, unk))
+                sents.append(i)
+    return np.array(ids, dtype=np.int64), np.array(sents, dtype=np.int64)
+
+def make_pairs(ids, sents, counts, window, sample, rng):
+    """Make all the (center, context) pairs of one epoch, vectorized over
+    the window offsets. Frequent words are sub-sampled as in word2vec, and
+    the window never crosses a sentence boundary.
+    """
+    if sample > 0:
+        freq = counts[ids] / counts.sum()
+        keep_prob = np.minimum(1., np.sqrt(sample / freq) + sample / freq)
+        keep = rng.random(len(ids)) < keep_prob
+        ids, sents = ids[keep], sents[keep]
+    centers = []
+    contexts = []
+    for offset in range(1, window + 1):
+        same = sents[:-offset] == sents[offset:]
+        left, right = ids[:-offset][same], ids[offset:][same]
+        centers.extend([left, right])
+        contexts.extend([right, left])
+    centers = np.concatenate(centers)
+    contexts = np.concatenate(contexts)
+    order = rng.permutation(len(centers))
+    return centers[order], contexts[order]
+
+def noise_table(counts, power=TABLE_POWER):
+    """The cumulative noise distribution P(w) ~ count(w)^0.75.
+    """
+    p = counts.astype(np.float64) ** power
+    return np.cumsum(p / p.sum())
+
+def sigmoid(x):
+    return 1. / (1. + np.exp(-np.clip(x, -30., 30.)))
+
+def scatter_add(w, rows, grads):
+    """`w[rows] += grads`, summing the updates of repeated rows.
+    A flat `np.bincount` over the touched rows is faster than `np.add.at`.
+    """
+    uniq, inverse = np.unique(rows, return_inverse=True)
+    dim = w.shape[1]
+    flat = (inverse[:, None] * dim + np.arange(dim)).ravel()
+    sums = np.bincount(flat, weights=grads.ravel(), minlength=len(uniq) * dim)
+    w[uniq] += sums.reshape(len(uniq), dim)
+
+def train_batch(w_in, w_out, centers, contexts, negatives, lr):
+    """One mini-batch of skip-gram with negative sampling, in place.
+
+    Args:
+        w_in: <np.ndarray> The word embeddings (V, D).
+        w_out: <np.ndarray> The context embeddings (V, D).
+        centers: <np.ndarray> Center word IDs (B,).
+        contexts: <np.ndarray> Context word IDs (B,).
+        negatives: <np.ndarray> Noise word IDs (B, K).
+        lr: <float> The learning rate.
+
+    Returns:
+        The summed negative log likelihood of the batch.
+    """
+    v = w_in[centers]  # (B, D)
+    u_pos = w_out[contexts]  # (B, D)
+    u_neg = w_out[negatives]  # (B, K, D)
+    s_pos = sigmoid(np.einsum('bd,bd->b', v, u_pos))
+    s_neg = sigmoid(np.einsum('bd,bkd->bk', v, u_neg))
+    loss = -np.log(s_pos + 1e-10).sum() - np.log(1. - s_neg + 1e-10).sum()
+
+    # Gradients of the loss w.r.t. the scores.
+    g_pos = s_pos - 1.
+    g_neg = s_neg
+    grad_v = g_pos[:, None] * u_pos + np.einsum('bk,bkd->bd', g_neg, u_neg)
+    grad_pos = g_pos[:, None] * v
+    grad_neg = g_neg[:, :, None] * v[:, None, :]
+
+    scatter_add(w_in, centers, -lr * grad_v)
+    scatter_add(w_out, np.concatenate((contexts, negatives.ravel())),
+                -lr * np.concatenate((grad_pos,
+                                      grad_neg.reshape(-1, v.shape[1]))))
+    return loss
+
+def train_epochs(w_in, w_out, ids, sents, counts, args, seed,
+                 worker=0, workers=1):
+    """Train on the pairs of this worker's share for all the epochs.
+    With several workers, `w_in` and `w_out` live in shared memory and are
+    updated without locks (Hogwild).
+    """
+    rng = np.random.default_rng(seed)
+    table = noise_table(counts)
+    loss = 0.
+    n_pairs = 0
+    for epoch in range(args['epochs']):
+        centers, contexts = make_pairs(ids, sents, counts, args['window'],
+                                       args['sample'], rng)
+        centers = centers[worker::workers]
+        contexts = contexts[worker::workers]
+        total = len(centers)
+        for begin in range(0, total, args['batch_size']):
+            # Decay the learning rate linearly, as word2vec does.
+            progress = (epoch + begin / max(total, 1)) / args['epochs']
+            lr = args['lr'] * max(1e-4, 1. - progress)
+            end = begin + args['batch_size']
+            negatives = np.searchsorted(
+                table, rng.random((len(centers[begin:end]), args['negative'])))
+            loss += train_batch(w_in, w_out, centers[begin:end],
+                                contexts[begin:end], negatives, lr)
+        n_pairs += total
+    return loss / max(n_pairs, 1)
+
+def shared_array(shape, init):
+    """A float64 array in shared memory, for the Hogwild workers.
+    """
+    raw = mp.RawArray('d', int(np.prod(shape)))
+    array = np.frombuffer(raw, dtype=np.float64).reshape(shape)
+    array[:] = init
+    return raw
+
+def hogwild_worker(raw_in, raw_out, shape, ids, sents, counts, args, seed,
+                   worker, workers):
+    w_in = np.frombuffer(raw_in, dtype=np.float64).reshape(shape)
+    w_out = np.frombuffer(raw_out, dtype=np.float64).reshape(shape)
+    train_epochs(w_in, w_out, ids, sents, counts, args, seed, worker, workers)
+
+def train_word2vec(training_file, model_file, vocab_file=None, dim=DIM,
+                   window=WINDOW, negative=NEGATIVE, batch_size=BATCH_SIZE,
+                   epochs=EPOCHS, lr=LR, min_count=MIN_COUNT, sample=SAMPLE,
+                   workers=1, seed=0):
+    """Train skip-gram word embeddings with negative sampling.
+    """
+    word_ids, counts = build_vocab(training_file, min_count)
+    ids, sents = load_corpus(training_file, word_ids)
+    args = {'window': window, 'negative': negative, 'batch_size': batch_size,
+            'epochs': epochs, 'lr': lr, 'sample': sample}
+
+    shape = (len(word_ids), dim)
+    rng = np.random.default_rng(seed)
+    init = (rng.random(shape) - 0.5) / dim
+    if workers > 1:
+        raw_in = shared_array(shape, init)
+        raw_out = shared_array(shape, 0.)
+        procs = [mp.Process(target=hogwild_worker,
+                            args=(raw_in, raw_out, shape, ids, sents, counts,
+                                  args, seed + i + 1, i, workers))
+                 for i in range(workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        w_in = np.frombuffer(raw_in, dtype=np.float64).reshape(shape)
+    else:
+        w_in = init
+        w_out = np.zeros(shape)
+        train_epochs(w_in, w_out, ids, sents, counts, args, seed + 1)
+
+    # Save the embeddings in the word2vec text format.
+    out = io.StringIO()
+    out.write('{} {}\n'.format(*shape))
+    for word, i in word_ids.items():
+        out.write('{} {}\n'.format(
+            word, ' '.join('{:.6f}'.format(x) for x in w_in[i])))
+
+    # Print on the screen or save in the model file.
+    if model_file == 'stdout':
+        print(out.getvalue().strip())
+    else:
+        with open(model_file, 'w') as f:
+            f.write(out.getvalue().strip())
+
+    # Save the vocabulary, one `word<tab>count` line per ID.
+    if vocab_file is not None:
+        with open(vocab_file, 'w') as f:
+            for word, i in word_ids.items():
+                f.write('{}\t{}\n'.format(word, counts[i]))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--training-file', type=str)
+    parser.add_argument('--model-file', type=str, default='stdout')
+    parser.add_argument('--vocab-file', type=str, default=None)
+    parser.add_argument('--dim', type=int, default=DIM)
+    parser.add_argument('--window', type=int, default=WINDOW)
+    parser.add_argument('--negative', type=int, default=NEGATIVE)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--lr', type=float, default=LR)
+    parser.add_argument('--min-count', type=int, default=MIN_COUNT)
+    parser.add_argument('--sample', type=float, default=SAMPLE)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    train_word2vec(args.training_file, args.model_file, args.vocab_file,
+                   args.dim, args.window, args.negative, args.batch_size,
+                   args.epochs, args.lr, args.min_count, args.sample,
+                   args.workers, args.seed)
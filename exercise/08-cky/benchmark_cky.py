@@ -0,0 +1,60 @@
+import io
+import time
+import argparse
+from collections import defaultdict
+try:  # Inside the `nlptut` package.
+    from . import cky
+except ImportError:  # Run as a script.
+    import cky
+
+def benchmark_cky(grammar_file, input_file, output_file, root='S',
+                  beams=(0,), bucket=10):
+    """Measure the parsing speed as the sentence length grows.
+    Sentences are grouped into length buckets of `bucket` words, and each
+    bucket is parsed once per beam width.
+    """
+    begin = time.perf_counter()
+    grammar = cky.load_grammar(grammar_file)
+    load_time = time.perf_counter() - begin
+
+    buckets = defaultdict(list)
+    with open(input_file, 'r') as f:
+        for line in f:
+            n = len(line.strip().split(' '))
+            buckets[(n - 1) // bucket * bucket + 1].append(line)
+
+    # Write the report into a buffer.
+    out = io.StringIO()
+    out.write('Grammar load: {:.3f}s\n'.format(load_time))
+    out.write('beam\tlength\tsents\tparsed\tsents/sec\n')
+    for beam in beams:
+        for start, lines in sorted(buckets.items()):
+            parsed = 0
+            begin = time.perf_counter()
+            for line in lines:
+                if cky.parse(grammar, line, root, beam):
+                    parsed += 1
+            elapsed = time.perf_counter() - begin
+            out.write('{}\t{}-{}\t{}\t{}\t{:.2f}\n'.format(
+                beam, start, start + bucket - 1, len(lines), parsed,
+                len(lines) / elapsed))
+
+    # Print on the screen or save in the file.
+    if output_file == 'stdout':
+        print(out.getvalue().strip())
+    else:
+        with open(output_file, 'w') as f:
+            f.write(out.getvalue().strip())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--grammar-file', type=str)
+    parser.add_argument('--input-file', type=str)
+    parser.add_argument('--output-file', type=str, default='stdout')
+    parser.add_argument('--root', type=str, default='S')
+    parser.add_argument('--beams', type=int, nargs='+', default=[0])
+    parser.add_argument('--bucket', type=int, default=10)
+    args = parser.parse_args()
+
+    benchmark_cky(args.grammar_file, args.input_file, args.output_file,
+                  args.root, args.beams, args.bucket)
@@ -0,0 +1,277 @@
+import io
+import math
+import argparse
+from collections import defaultdict
+import numpy as np
+
+NEG_INF = -np.inf
+LEXICAL = -1  # Backpointer of a pre-terminal built directly on a word.
+NONE = -2  # No backpointer.
+
+class Grammar(object):
+    """A PCFG with its rules turned into integer-ID arrays.
+
+    Symbols are numbered in `symbols`/`sym_id`. Binary rules are stored in
+    parallel arrays (`left`, `right`, `parent`, `logp`), sorted by their
+    right-hand-side pair, and `pair_keys`/`pair_ptr` index each pair
+    `left * n + right` into the range of rules sharing it. Unary rules
+    (e.g. `ROOT_NP -> NP`) and lexical rules are kept apart.
+    """
+
+    def __init__(self, binary, unary, lexical):
+        symbols = set()
+        for lhs, l, r, _ in binary:
+            symbols.update((lhs, l, r))
+        for lhs, child, _ in unary:
+            symbols.update((lhs, child))
+        for lhs, _, _ in lexical:
+            symbols.add(lhs)
+        self.symbols = sorted(symbols)
+        self.sym_id = {s: i for i, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+
+        # Binary rules, indexed by their right-hand-side pair.
+        rules = sorted((self.sym_id[l] * n + self.sym_id[r], self.sym_id[lhs],
+                        self.sym_id[l], self.sym_id[r], logp)
+                       for lhs, l, r, logp in binary)
+        keys = np.array([x[0] for x in rules], dtype=np.int64)
+        self.parent = np.array([x[1] for x in rules], dtype=np.int32)
+        self.left = np.array([x[2] for x in rules], dtype=np.int32)
+        self.right = np.array([x[3] for x in rules], dtype=np.int32)
+        self.logp = np.array([x[4] for x in rules], dtype=np.float64)
+        self.pair_keys, first = np.unique(keys, return_index=True)
+        self.pair_ptr = np.append(first, len(rules)).astype(np.int64)
+
+        # Unary rules between non-terminals.
+        self.u_parent = np.array([self.sym_id[lhs] for lhs, _, _ in unary],
+                                 dtype=np.int32)
+        self.u_child = np.array([self.sym_id[c] for _, c, _ in unary],
+                                dtype=np.int32)
+        self.u_logp = np.array([logp for _, _, logp in unary],
+                               dtype=np.float64)
+
+        # Lexical rules, word -> (pre-terminal IDs, log probabilities).
+        lex = defaultdict(list)
+        for lhs, word, logp in lexical:
+            lex[word].append((self.sym_id[lhs], logp))
+        self.lexical = {}
+        for word, entries in lex.items():
+            self.lexical[word] = (np.array([e[0] for e in entries],
+                                           dtype=np.int32),
+                                  np.array([e[1] for e in entries],
+                                           dtype=np.float64))
+
+    def __len__(self):
+        return len(self.symbols)
+
+def load_grammar(grammar_file):
+    """Load a PCFG from the file.
+    Each line is `LHS<tab>RHS<tab>PROB`. A rule with two right-hand symbols
+    is binary. A rule with one is lexical, and it is also a unary rule if its
+    right-hand side is itself a left-hand symbol of the grammar
+    (e.g. `ROOT_NP<tab>NP`).
+
+    Args:
+        grammar_file: <str> The grammar file path, e.g. `test/08-grammar.txt`.
+
+    Returns:
+        A <Grammar>.
+    """
+    binary = []
+    single = []
+    with open(grammar_file, 'r') as f:
+        for line in f:
+            lhs, rhs, prob = line.rstrip('\n').split('\t')
+            rhs = rhs.split(' ')
+            logp = math.log(float(prob))
+            if len(rhs) == 2:
+                binary.append((lhs, rhs[0], rhs[1], logp))
+            else:
+                single.append((lhs, rhs[0], logp))
+    nonterminals = {x[0] for x in binary} | {x[0] for x in single}
+    unary = [x for x in single if x[1] in nonterminals and x[1] != x[0]]
+    return Grammar(binary, unary, single)
+
+def expand_ranges(starts, counts):
+    """Concatenate `range(s, s + c)` for every (s, c), without a loop.
+    """
+    total = counts.sum()
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total)
+
+def apply_unary(grammar, cell, back_rule):
+    """Close a chart cell under the unary rules, in place.
+    The log probabilities are never positive, so improvements can't cycle.
+    """
+    if not len(grammar.u_parent):
+        return
+    for _ in range(len(grammar)):
+        cand = cell[grammar.u_child] + grammar.u_logp
+        better = cand > cell[grammar.u_parent]
+        if not better.any():
+            return
+        # Keep the best unary rule for each parent.
+        idx = np.flatnonzero(better)
+        idx = idx[np.lexsort((-cand[idx], grammar.u_parent[idx]))]
+        parents, first = np.unique(grammar.u_parent[idx], return_index=True)
+        idx = idx[first]
+        cell[parents] = cand[idx]
+        back_rule[parents] = len(grammar.parent) + idx
+
+def prune(cell, beam):
+    """Keep only the `beam` best symbols of a chart cell, in place.
+    """
+    present = np.flatnonzero(cell > NEG_INF)
+    if beam <= 0 or len(present) <= beam:
+        return
+    keep = present[np.argpartition(-cell[present], beam - 1)[:beam]]
+    mask = np.ones(len(cell), dtype=bool)
+    mask[keep] = False
+    cell[mask] = NEG_INF
+
+def forward(grammar, words, beam=0):
+    """Fill the CKY chart, the inside pass of the Viterbi algorithm.
+
+    `chart[i, j, s]` is the best log probability of symbol `s` over the words
+    `i..j-1`. For each cell, only the right-hand-side pairs made of symbols
+    present in both sub-cells of a split point are looked up in the pair
+    index, and all split points are handled together.
+
+    Args:
+        grammar: <Grammar>
+        words: <list of str> The words of a sentence.
+        beam: <int> Symbols kept per cell, 0 for no pruning.
+
+    Returns:
+        A tuple of the chart, the rule backpointers and the split
+        backpointers (all <np.ndarray> of shape (n+1, n+1, #symbols)).
+    """
+    n = len(words)
+    n_sym = len(grammar)
+    chart = np.full((n + 1, n + 1, n_sym), NEG_INF)
+    back_rule = np.full((n + 1, n + 1, n_sym), NONE, dtype=np.int32)
+    back_split = np.zeros((n + 1, n + 1, n_sym), dtype=np.int32)
+
+    # Add the pre-terminals.
+    for i, word in enumerate(words):
+        if word in grammar.lexical:
+            syms, logp = grammar.lexical[word]
+            chart[i, i + 1, syms] = logp
+            back_rule[i, i + 1, syms] = LEXICAL
+        apply_unary(grammar, chart[i, i + 1], back_rule[i, i + 1])
+        prune(chart[i, i + 1], beam)
+
+    # Combine the non-terminals, the shorter spans first.
+    for length in range(2, n + 1):
+        for i in range(0, n - length + 1):
+            j = i + length
+            cell = chart[i, j]
+            # Present symbols of the left cells (i, k) and right cells (k, j),
+            # for all the split points k at once, ordered by k.
+            l_k, l_sym = np.nonzero(chart[i, i + 1:j] > NEG_INF)
+            r_k, r_sym = np.nonzero(chart[i + 1:j, j] > NEG_INF)
+            r_count = np.bincount(r_k, minlength=length - 1)
+            r_start = np.cumsum(r_count) - r_count
+            # Pair each left symbol with every right symbol of the same k.
+            counts = r_count[l_k]
+            left_idx = np.repeat(np.arange(len(l_k)), counts)
+            right_idx = expand_ranges(r_start[l_k], counts)
+            keys = l_sym[left_idx] * n_sym + r_sym[right_idx]
+            # Look the pairs up in the rule index.
+            pos = np.searchsorted(grammar.pair_keys, keys)
+            pos[pos == len(grammar.pair_keys)] = 0
+            hit = grammar.pair_keys[pos] == keys
+            if hit.any():
+                pos = pos[hit]
+                starts = grammar.pair_ptr[pos]
+                n_rules = grammar.pair_ptr[pos + 1] - starts
+                rules = expand_ranges(starts, n_rules)
+                splits = np.repeat(l_k[left_idx[hit]], n_rules) + i + 1
+                scores = (chart[i, splits, grammar.left[rules]] +
+                          chart[splits, j, grammar.right[rules]] +
+                          grammar.logp[rules])
+                # Keep the best candidate for each parent symbol.
+                parents = grammar.parent[rules]
+                order = np.lexsort((-scores, parents))
+                best_parents, first = np.unique(parents[order],
+                                                return_index=True)
+                best = order[first]
+                cell[best_parents] = scores[best]
+                back_rule[i, j, best_parents] = rules[best]
+                back_split[i, j, best_parents] = splits[best]
+            apply_unary(grammar, cell, back_rule[i, j])
+            prune(cell, beam)
+    return chart, back_rule, back_split
+
+def backward(grammar, words, back_rule, back_split, sym, i, j):
+    """Build the Penn-format tree of symbol `sym` over the words `i..j-1`
+    from the backpointers.
+    """
+    rule = back_rule[i, j, sym]
+    name = grammar.symbols[sym]
+    if rule == LEXICAL:
+        return '({} {})'.format(name, words[i])
+    n_binary = len(grammar.parent)
+    if rule >= n_binary:  # Unary rule.
+        child = grammar.u_child[rule - n_binary]
+        return '({} {})'.format(
+            name, backward(grammar, words, back_rule, back_split, child, i, j))
+    k = back_split[i, j, sym]
+    left = backward(grammar, words, back_rule, back_split,
+                    grammar.left[rule], i, k)
+    right = backward(grammar, words, back_rule, back_split,
+                     grammar.right[rule], k, j)
+    return '({} {} {})'.format(name, left, right)
+
+def root_ids(grammar, root):
+    """The symbols accepted at the top of the tree: the root itself and its
+    annotated variants (e.g. `ROOT_S`, `ROOT_NP` for the root `ROOT`).
+    """
+    return np.array([i for i, s in enumerate(grammar.symbols)
+                     if s == root or s.startswith(root + '_')],
+                    dtype=np.int32)
+
+def parse(grammar, line, root='S', beam=0):
+    """Parse a line into a Penn-format tree.
+
+    Returns:
+        The tree <str>, or an empty string if there is no parse.
+    """
+    words = line.strip().split(' ')
+    chart, back_rule, back_split = forward(grammar, words, beam)
+    roots = root_ids(grammar, root)
+    top = chart[0, len(words), roots]
+    if not len(roots) or top.max() == NEG_INF:
+        return ''
+    sym = roots[np.argmax(top)]
+    return backward(grammar, words, back_rule, back_split, sym, 0, len(words))
+
+def cky(grammar_file, input_file, output_file, root='S', beam=0):
+    grammar = load_grammar(grammar_file)
+
+    # Write the trees into a buffer.
+    out = io.StringIO()
+
+    with open(input_file, 'r') as f:
+        for line in f:
+            out.write(parse(grammar, line, root, beam) + '\n')
+
+    # Print on the screen or save in the file.
+    if output_file == 'stdout':
+        print(out.getvalue().strip())
+    else:
+        with open(output_file, 'w') as f:
+            f.write(out.getvalue().strip())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--grammar-file', type=str)
+    parser.add_argument('--input-file', type=str)
+    parser.add_argument('--output-file', type=str, default='stdout')
+    # Use `--root ROOT` for `data/wiki-en-test.grammar`.
+    parser.add_argument('--root', type=str, default='S')
+    parser.add_argument('--beam', type=int, default=0)
+    args = parser.parse_args()
+
+    cky(args.grammar_file, args.input_file, args.output_file,
+        args.root, args.beam)
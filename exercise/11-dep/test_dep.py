@@ -0,0 +1,55 @@
+import io
+import argparse
+import numpy as np
+try:  # Inside the `nlptut` package.
+    from . import train_dep
+except ImportError:  # Run as a script.
+    import train_dep
+
+def load_model(model_file):
+    """Load the model from file.
+
+    Returns:
+        A tuple of the feature IDs <dict> and the weights <np.ndarray>.
+    """
+    ids = {}
+    values = []
+    with open(model_file, 'r') as f:
+        for line in f:
+            name, value = line.rstrip('\n').split('\t')
+            ids[name] = len(ids)
+            values.append(float(value))
+    return ids, np.array(values)
+
+def test_dep(model_file, test_file, output_file):
+    """Parse all the sentences of the test file with a trained model.
+    The output is in the 8-column format read by `script/grade-dep.py`,
+    with the predicted heads and `_` as the labels.
+    """
+    ids, w = load_model(model_file)
+
+    # Write the result into a buffer.
+    out = io.StringIO()
+
+    for sentence in train_dep.load_sentences(test_file):
+        phi = train_dep.create_features(sentence, ids)
+        heads = train_dep.predict_one(w, phi)
+        for token, head in zip(sentence, heads[1:]):
+            out.write('\t'.join(token[:6] + [str(head), '_']) + '\n')
+        out.write('\n')
+
+    # Print on the screen or save in the file.
+    if output_file == 'stdout':
+        print(out.getvalue())
+    else:
+        with open(output_file, 'w') as f:
+            f.write(out.getvalue())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model-file', type=str)
+    parser.add_argument('--test-file', type=str)
+    parser.add_argument('--output-file', type=str, default='stdout')
+    args = parser.parse_args()
+
+    test_dep(args.model_file, args.test_file, args.output_file)
@@ -0,0 +1,213 @@
+import io
+import argparse
+import numpy as np
+
+ROOT = '<ROOT>'
+EPOCHS = 10
+MAX_DIST = 5  # Arc distances are bucketed up to this value.
+
+def load_sentences(dep_file):
+    """Load the sentences of a file in the 8-column MSTParser format.
+
+    Args:
+        dep_file: <str> The file path, e.g. `data/mstparser-en-train.dep`.
+
+    Returns:
+        A <list of list> of sentences, each token being the <list of str> of
+        its 8 columns.
+    """
+    sentences = []
+    sentence = []
+    with open(dep_file, 'r') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line:
+                sentence.append(line.split('\t'))
+            elif sentence:
+                sentences.append(sentence)
+                sentence = []
+    if sentence:
+        sentences.append(sentence)
+    return sentences
+
+def arc_features(words, tags, h, d):
+    """Feature names of the arc from the head `h` to the dependent `d`.
+    (Extends the `UNI:` features of the perceptron to word pairs.)
+    """
+    hw, hp, dw, dp = words[h], tags[h], words[d], tags[d]
+    dist = '{}{}'.format('R' if h < d else 'L', min(abs(h - d), MAX_DIST))
+    hp_r = tags[h + 1] if h + 1 < len(tags) else '</s>'
+    dp_l = tags[d - 1] if d > 0 else '<s>'
+    return ['BIAS:' + dist,
+            'HW:' + hw, 'HP:' + hp, 'DW:' + dw, 'DP:' + dp,
+            'HWP:{} {}'.format(hw, hp), 'DWP:{} {}'.format(dw, dp),
+            'WW:{} {}'.format(hw, dw), 'WP:{} {}'.format(hw, dp),
+            'PW:{} {}'.format(hp, dw), 'PP:{} {}'.format(hp, dp),
+            'PPD:{} {} {}'.format(hp, dp, dist),
+            'WWD:{} {} {}'.format(hw, dw, dist),
+            'PPC:{} {} {} {}'.format(hp, hp_r, dp_l, dp)]
+
+def create_features(sentence, ids, add=False):
+    """Extract the features of all the n^2 possible arcs of a sentence once,
+    into a sparse arc-by-feature matrix in CSR form.
+    Arc (h, d) is row `h * (n + 1) + d`, where 0 is the root.
+
+    Args:
+        sentence: <list> Tokens loaded by `load_sentences()`.
+        ids: <dict> Feature name -> feature ID.
+        add: <bool> Give new IDs to unseen features (in training).
+
+    Returns:
+        A tuple of <np.ndarray>: the row pointers and the feature IDs.
+    """
+    words = [ROOT] + [t[1] for t in sentence]
+    tags = [ROOT] + [t[3] for t in sentence]
+    size = len(words)
+    indptr = [0]
+    indices = []
+    for h in range(size):
+        for d in range(size):
+            if d != 0 and d != h:
+                for name in arc_features(words, tags, h, d):
+                    if name in ids:
+                        indices.append(ids[name])
+                    elif add:
+                        ids[name] = len(ids)
+                        indices.append(ids[name])
+            indptr.append(len(indices))
+    return (np.array(indptr, dtype=np.int64),
+            np.array(indices, dtype=np.int64))
+
+def score_arcs(w, phi):
+    """Score all the arcs with one sparse matrix-vector product.
+
+    Returns:
+        A <np.ndarray> of shape (n+1, n+1), `scores[h, d]` for the arc h->d.
+    """
+    indptr, indices = phi
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    scores = np.bincount(rows, weights=w[indices], minlength=len(indptr) - 1)
+    size = int(round(np.sqrt(len(indptr) - 1)))
+    return scores.reshape(size, size)
+
+def eisner(scores):
+    """Find the best projective tree with Eisner's algorithm.
+
+    Args:
+        scores: <np.ndarray> The arc scores, `scores[h, d]`.
+
+    Returns:
+        The heads <list of int>, `heads[d]` for d = 1..n (heads[0] is -1).
+    """
+    size = len(scores)
+    # [s, t, 0]: the head is t (left arc), [s, t, 1]: the head is s.
+    complete = np.zeros((size, size, 2))
+    incomplete = np.zeros((size, size, 2))
+    complete_bp = np.zeros((size, size, 2), dtype=np.int64)
+    incomplete_bp = np.zeros((size, size, 2), dtype=np.int64)
+    for k in range(1, size):
+        for s in range(size - k):
+            t = s + k
+            # Join two complete spans and add an arc between s and t.
+            vals = complete[s, s:t, 1] + complete[s + 1:t + 1, t, 0]
+            r = int(np.argmax(vals))
+            incomplete[s, t, 0] = vals[r] + scores[t, s]
+            incomplete[s, t, 1] = vals[r] + scores[s, t]
+            incomplete_bp[s, t, :] = s + r
+            # Extend an incomplete span with a complete one.
+            vals = complete[s, s:t, 0] + incomplete[s:t, t, 0]
+            r = int(np.argmax(vals))
+            complete[s, t, 0] = vals[r]
+            complete_bp[s, t, 0] = s + r
+            vals = incomplete[s, s + 1:t + 1, 1] + complete[s + 1:t + 1, t, 1]
+            r = int(np.argmax(vals))
+            complete[s, t, 1] = vals[r]
+            complete_bp[s, t, 1] = s + 1 + r
+
+    heads = [-1] * size
+    stack = [(0, size - 1, 1, True)]
+    while stack:
+        s, t, direction, is_complete = stack.pop()
+        if s == t:
+            continue
+        if is_complete:
+            r = complete_bp[s, t, direction]
+            if direction == 0:
+                stack.extend([(s, r, 0, True), (r, t, 0, False)])
+            else:
+                stack.extend([(s, r, 1, False), (r, t, 1, True)])
+        else:
+            r = incomplete_bp[s, t, direction]
+            if direction == 0:
+                heads[s] = t
+            else:
+                heads[t] = s
+            stack.extend([(s, r, 1, True), (r + 1, t, 0, True)])
+    return heads
+
+def predict_one(w, phi):
+    """Predict the heads of one sentence.
+    """
+    return eisner(score_arcs(w, phi))
+
+def arc_feature_ids(phi, heads):
+    """The feature IDs of the arcs of a tree, to update the weights with.
+    """
+    indptr, indices = phi
+    size = len(heads)
+    rows = [heads[d] * size + d for d in range(1, size)]
+    return np.concatenate([indices[indptr[r]:indptr[r + 1]] for r in rows])
+
+def update_weights(w, u, c, phi, heads, heads_prime):
+    """Update the weights of the averaged perceptron: add the features of
+    the correct tree and subtract those of the predicted one. `u` keeps the
+    updates weighted by the example counter `c`, for the averaging.
+    """
+    gold = arc_feature_ids(phi, heads)
+    pred = arc_feature_ids(phi, heads_prime)
+    np.add.at(w, gold, 1)
+    np.add.at(w, pred, -1)
+    np.add.at(u, gold, c)
+    np.add.at(u, pred, -c)
+
+def train_dep(training_file, model_file, epochs=EPOCHS):
+    """Online learning for the averaged structured perceptron.
+    The features are extracted once and cached for all the epochs.
+    """
+    sentences = load_sentences(training_file)
+    ids = {}
+    cache = [create_features(s, ids, add=True) for s in sentences]
+    golds = [[-1] + [int(t[6]) for t in s] for s in sentences]
+
+    w = np.zeros(len(ids))
+    u = np.zeros(len(ids))
+    c = 1
+    for epoch in range(epochs):
+        for phi, heads in zip(cache, golds):
+            heads_prime = predict_one(w, phi)  # Try to parse each sentence.
+            if heads_prime != heads:  # If make a mistake...
+                update_weights(w, u, c, phi, heads, heads_prime)
+            c += 1
+    w_avg = w - u / c
+
+    # Save the model into a buffer temporarily.
+    out = io.StringIO()
+    for name, i in ids.items():
+        if w_avg[i] != 0:
+            out.write('{}\t{}\n'.format(name, w_avg[i]))
+
+    # Print on the screen or save in the file.
+    if model_file == 'stdout':
+        print(out.getvalue().strip())
+    else:
+        with open(model_file, 'w') as f:
+            f.write(out.getvalue().strip())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--training-file', type=str)
+    parser.add_argument('--model-file', type=str, default='stdout')
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    args = parser.parse_args()
+
+    train_dep(args.training_file, args.model_file, args.epochs)
@@ -0,0 +1,55 @@
+import math
+import functools
+
+MAXSIZE = 1 << 16  # Default number of cached keys.
+
+def neg_log2(prob):
+    """The cost of a probability, as used by all the decoders.
+    """
+    return -math.log2(prob)
+
+class ScoreCache(object):
+    """Negative log2 probabilities of frequent keys (substrings, n-grams,
+    'TAG WORD' pairs) kept in a bounded LRU cache, so they are not looked up
+    and `-math.log2`'d again for every line.
+
+    Costs that do not depend on the key, like the smoothed cost of an
+    unknown word, should be computed once with `neg_log2()` and not go
+    through the cache at all.
+
+    Args:
+        cost: <callable> key -> negative log2 probability.
+        maxsize: <int> Number of cached keys, None for no bound and 0 to
+                 disable the cache.
+    """
+
+    def __init__(self, cost, maxsize=MAXSIZE):
+        self.maxsize = maxsize
+        if maxsize == 0:
+            self.lookup = cost
+        else:
+            self.lookup = functools.lru_cache(maxsize=maxsize)(cost)
+
+    def __call__(self, key):
+        return self.lookup(key)
+
+    def stats(self):
+        """Hit/miss statistics of the cache.
+
+        Returns:
+            A dict with the hits, misses, current size, max size and hit rate.
+        """
+        if self.maxsize == 0:
+            return {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 0,
+                    'hit_rate': 0.}
+        info = self.lookup.cache_info()
+        total = info.hits + info.misses
+        return {'hits': info.hits, 'misses': info.misses,
+                'size': info.currsize, 'maxsize': info.maxsize,
+                'hit_rate': info.hits / total if total else 0.}
+
+    def clear(self):
+        """Drop the cached costs, e.g. after the model has been updated.
+        """
+        if self.maxsize != 0:
+            self.lookup.cache_clear()
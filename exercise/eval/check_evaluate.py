@@ -0,0 +1,61 @@
+import os
+import sys
+import argparse
+try:  # Inside the `nlptut` package.
+    from . import evaluate
+    from ..ws import word_segmentation
+except ImportError:  # Run as a script.
+    import evaluate
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 '..', '03-ws'))
+    import word_segmentation
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+def check_evaluate(ref_file, input_file, model_file, answer_file, tmp_file):
+    """Regression check of the segmentation scores on the shipped Japanese
+    data, whose gold lines 81-83 start with an ideographic space.
+
+    Returns:
+        A list of the failed checks, empty if all passed.
+    """
+    failures = []
+    # The gold data graded against itself, in strict mode.
+    stats = evaluate.grade_segmentation(ref_file, ref_file, strict=True)
+    if stats['word_f'] != 1. or stats['sent_skipped']:
+        failures.append('gold vs gold: {}'.format(stats))
+    # The output of `word_segmentation.py`, against the expected scores
+    # (the same as `gradews.pl` with the leading spaces removed).
+    probs_uni = word_segmentation.load_model(model_file)
+    word_segmentation.word_segmentation(probs_uni, input_file, tmp_file)
+    result = evaluate.format_segmentation(
+        evaluate.grade_segmentation(ref_file, tmp_file, strict=True))
+    with open(answer_file, 'r') as f:
+        answer = f.read()
+    if result.strip() != answer.strip():
+        failures.append('scores:\n{}\nexpected:\n{}'.format(result.strip(),
+                                                          answer.strip()))
+    return failures
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ref-file', type=str,
+                        default=os.path.join(ROOT, 'data', 'wiki-ja-test.word'))
+    parser.add_argument('--input-file', type=str,
+                        default=os.path.join(ROOT, 'data', 'wiki-ja-test.txt'))
+    parser.add_argument('--model-file', type=str,
+                        default=os.path.join(ROOT, 'data', 'big-ws-model.txt'))
+    parser.add_argument('--answer-file', type=str,
+                        default=os.path.join(ROOT, 'test',
+                                             '03-eval-answer.txt'))
+    parser.add_argument('--tmp-file', type=str, default='ws-output.tmp')
+    args = parser.parse_args()
+
+    failures = check_evaluate(args.ref_file, args.input_file, args.model_file,
+                              args.answer_file, args.tmp_file)
+    os.remove(args.tmp_file)
+    for failure in failures:
+        print('FAILED ' + failure)
+    if failures:
+        sys.exit(1)
+    print('OK')
@@ -0,0 +1,298 @@
+import io
+import sys
+import argparse
+from itertools import islice
+import numpy as np
+
+BLOCK_SIZE = 4096  # Number of lines scored together in one vectorized pass.
+
+def load_vocab(training_file):
+    """Load the known words from a training file.
+    Both plain word files and `word_tag` files (e.g. `wiki-en-train.norm_pos`)
+    are accepted, the tag part is dropped.
+
+    Args:
+        training_file: <str> The training file path.
+
+    Returns:
+        A set of known words.
+    """
+    vocab = set()
+    with open(training_file, 'r') as f:
+        for line in f:
+            for token in split_words(line.rstrip('\r\n')):
+                vocab.add(token.rpartition('_')[0] or token)
+    return vocab
+
+def strip_tag(token):
+    """Keep only the tag of a `word_tag` token, like `gradepos.pl` does.
+    """
+    return token.rpartition('_')[2]
+
+def read_blocks(ref_file, test_file, block_size=BLOCK_SIZE):
+    """Read the reference and the test file in parallel, block by block,
+    so arbitrarily large files can be scored with bounded memory.
+
+    Args:
+        ref_file: <str> The reference (gold) file path.
+        test_file: <str> The system output file path.
+        block_size: <int> Number of lines per block.
+
+    Yields:
+        A tuple of two aligned <list of str>, the reference and test lines.
+    """
+    with open(ref_file, 'r') as fr, open(test_file, 'r') as ft:
+        while True:
+            refs = [line.rstrip('\r\n') for line in islice(fr, block_size)]
+            tests = [line.rstrip('\r\n') for line in islice(ft, block_size)]
+            if len(refs) != len(tests):
+                raise ValueError('Line numbers of reference and test '
+                                 'files don\'t match')
+            if not refs:
+                return
+            yield refs, tests
+
+def split_words(line):
+    """Split on ASCII spaces only. Other whitespace (e.g. the ideographic
+    space in the Japanese data) can be a word by itself.
+    """
+    return [w for w in line.split(' ') if w]
+
+def normalize_segmentation(line):
+    """Strip the line the way `word_segmentation.py` strips its input, so a
+    leading ideographic space of the gold data (lines 81-83 of
+    `wiki-ja-test.word`) does not misalign the character offsets.
+    """
+    return line.strip()
+
+def word_spans(lines):
+    """Turn a block of segmented lines into character-offset word spans.
+    Spaces are not counted, so the offsets of the reference and the test
+    segmentation of the same text are comparable. Offsets run on across the
+    whole block, which lets one block be matched with a single set operation.
+
+    Args:
+        lines: <list of str> Segmented lines, words separated by spaces.
+
+    Returns:
+        A tuple of <np.ndarray>: the span begins, the span ends and the
+        number of characters of each line.
+    """
+    words = [split_words(line) for line in lines]
+    lengths = np.fromiter((len(w) for ws in words for w in ws),
+                          dtype=np.int64)
+    n_words = np.fromiter((len(ws) for ws in words),
+                          dtype=np.int64, count=len(words))
+    ends = np.cumsum(lengths)
+    begins = ends - lengths
+    # Characters per line are the sums of word lengths within each line.
+    line_ends = np.concatenate(([0], np.cumsum(n_words)))
+    line_chars = np.diff(np.concatenate(([0], ends))[line_ends])
+    return begins, ends, line_chars
+
+def grade_segmentation(ref_file, test_file, block_size=BLOCK_SIZE,
+                       strict=False):
+    """Score a word segmentation against the reference.
+    Words are compared as (begin, end) character spans, and boundaries as
+    the sets of span ends that are not the end of a line.
+    Lines whose characters differ between the reference and the test are
+    reported on stderr and skipped, or raise a ValueError if `strict`.
+
+    Args:
+        ref_file: <str> The reference segmentation file path.
+        test_file: <str> The system segmentation file path.
+        block_size: <int> Number of lines scored at once.
+        strict: <bool> Abort on the first mismatched line.
+
+    Returns:
+        A dict of counts and scores.
+    """
+    stats = dict.fromkeys(['sent_total', 'sent_correct',
+                           'word_ref', 'word_test', 'word_correct',
+                           'bound_ref', 'bound_test', 'bound_correct',
+                           'gap_total', 'gap_correct', 'sent_skipped'], 0)
+    line_no = 0  # Lines read before the current block.
+    for refs, tests in read_blocks(ref_file, test_file, block_size):
+        refs = [normalize_segmentation(line) for line in refs]
+        tests = [normalize_segmentation(line) for line in tests]
+        r_begins, r_ends, r_chars = word_spans(refs)
+        t_begins, t_ends, t_chars = word_spans(tests)
+        mismatched = np.flatnonzero(r_chars != t_chars)
+        for i in mismatched:
+            message = 'Mismatched line {}:\n{}\n{}'.format(
+                line_no + i + 1, refs[i], tests[i])
+            if strict:
+                raise ValueError(message)
+            sys.stderr.write('Skipped. {}\n'.format(message))
+        line_no += len(refs)
+        if mismatched.size:
+            aligned = r_chars == t_chars
+            refs = [r for r, keep in zip(refs, aligned) if keep]
+            tests = [t for t, keep in zip(tests, aligned) if keep]
+            stats['sent_skipped'] += int(mismatched.size)
+            r_begins, r_ends, r_chars = word_spans(refs)
+            t_begins, t_ends, t_chars = word_spans(tests)
+        # Encode each span into one integer, then match the span sets.
+        base = int(r_chars.sum()) + 1
+        r_keys = r_begins * base + r_ends
+        t_keys = t_begins * base + t_ends
+        word_correct = np.intersect1d(r_keys, t_keys, assume_unique=True).size
+        # Word-internal boundaries are the span ends except the line ends.
+        line_ends = np.cumsum(r_chars)
+        r_bounds = np.setdiff1d(r_ends, line_ends, assume_unique=True)
+        t_bounds = np.setdiff1d(t_ends, line_ends, assume_unique=True)
+        bound_correct = np.intersect1d(r_bounds, t_bounds,
+                                       assume_unique=True).size
+        # Every gap between two characters is one boundary decision.
+        gap_total = int(np.maximum(r_chars - 1, 0).sum())
+        gap_wrong = r_bounds.size + t_bounds.size - 2 * bound_correct
+
+        stats['sent_total'] += len(refs)
+        stats['sent_correct'] += sum(r == t for r, t in zip(refs, tests))
+        stats['word_ref'] += r_keys.size
+        stats['word_test'] += t_keys.size
+        stats['word_correct'] += word_correct
+        stats['bound_ref'] += r_bounds.size
+        stats['bound_test'] += t_bounds.size
+        stats['bound_correct'] += bound_correct
+        stats['gap_total'] += gap_total
+        stats['gap_correct'] += gap_total - gap_wrong
+
+    stats['word_prec'], stats['word_rec'], stats['word_f'] = prf(
+        stats['word_correct'], stats['word_test'], stats['word_ref'])
+    stats['bound_prec'], stats['bound_rec'], stats['bound_f'] = prf(
+        stats['bound_correct'], stats['bound_test'], stats['bound_ref'])
+    stats['sent_acc'] = ratio(stats['sent_correct'], stats['sent_total'])
+    stats['gap_acc'] = ratio(stats['gap_correct'], stats['gap_total'])
+    return stats
+
+def grade_tagging(ref_file, test_file, word_file=None, vocab=None,
+                  block_size=BLOCK_SIZE):
+    """Score a tag sequence against the reference.
+    If the test words and a vocabulary are given, the accuracy is also
+    broken down into known and unknown words.
+
+    Args:
+        ref_file: <str> The reference tag file path.
+        test_file: <str> The system tag file path (e.g. by `test_hmm.py`).
+        word_file: <str> The test word file path, aligned with the tags.
+        vocab: <set> The words seen in training.
+        block_size: <int> Number of lines scored at once.
+
+    Returns:
+        A dict of counts and scores.
+    """
+    stats = dict.fromkeys(['total', 'correct', 'known_total', 'known_correct',
+                           'unk_total', 'unk_correct'], 0)
+    by_words = word_file is not None and vocab is not None
+    words_f = open(word_file, 'r') if by_words else None
+    try:
+        for refs, tests in read_blocks(ref_file, test_file, block_size):
+            ref_tags = []
+            test_tags = []
+            for r, t in zip(refs, tests):
+                r, t = split_words(r), split_words(t)
+                if len(r) != len(t):
+                    raise ValueError('Line lengths don\'t match:\n{}\n{}'
+                                     .format(' '.join(r), ' '.join(t)))
+                ref_tags.extend(r)
+                test_tags.extend(t)
+            correct = (np.array([strip_tag(t) for t in ref_tags]) ==
+                       np.array([strip_tag(t) for t in test_tags]))
+            stats['total'] += correct.size
+            stats['correct'] += int(np.count_nonzero(correct))
+
+            if by_words:
+                words = [w for line in islice(words_f, len(refs))
+                         for w in split_words(line.rstrip('\r\n'))]
+                if len(words) != correct.size:
+                    raise ValueError('Word file is not aligned with the tags')
+                known = np.fromiter((w in vocab for w in words),
+                                    dtype=bool, count=len(words))
+                stats['known_total'] += int(np.count_nonzero(known))
+                stats['known_correct'] += int(np.count_nonzero(correct & known))
+    finally:
+        if words_f is not None:
+            words_f.close()
+
+    if by_words:
+        stats['unk_total'] = stats['total'] - stats['known_total']
+        stats['unk_correct'] = stats['correct'] - stats['known_correct']
+    stats['acc'] = ratio(stats['correct'], stats['total'])
+    stats['known_acc'] = ratio(stats['known_correct'], stats['known_total'])
+    stats['unk_acc'] = ratio(stats['unk_correct'], stats['unk_total'])
+    return stats
+
+def ratio(a, b):
+    return a / b if b else 0.
+
+def prf(correct, test, ref):
+    """Precision, recall and F-measure from the raw counts.
+    """
+    prec = ratio(correct, test)
+    rec = ratio(correct, ref)
+    f = ratio(2 * prec * rec, prec + rec)
+    return prec, rec, f
+
+def format_segmentation(s):
+    out = io.StringIO()
+    out.write('Sent Accuracy: {:.2%} ({}/{})\n'.format(
+        s['sent_acc'], s['sent_correct'], s['sent_total']))
+    out.write('Word Prec: {:.2%} ({}/{})\n'.format(
+        s['word_prec'], s['word_correct'], s['word_test']))
+    out.write('Word Rec: {:.2%} ({}/{})\n'.format(
+        s['word_rec'], s['word_correct'], s['word_ref']))
+    out.write('Word F-meas: {:.2%}\n'.format(s['word_f']))
+    out.write('Bound Prec: {:.2%} ({}/{})\n'.format(
+        s['bound_prec'], s['bound_correct'], s['bound_test']))
+    out.write('Bound Rec: {:.2%} ({}/{})\n'.format(
+        s['bound_rec'], s['bound_correct'], s['bound_ref']))
+    out.write('Bound F-meas: {:.2%}\n'.format(s['bound_f']))
+    out.write('Bound Accuracy: {:.2%} ({}/{})\n'.format(
+        s['gap_acc'], s['gap_correct'], s['gap_total']))
+    if s['sent_skipped']:
+        out.write('Skipped Sents: {}\n'.format(s['sent_skipped']))
+    return out.getvalue()
+
+def format_tagging(s):
+    out = io.StringIO()
+    out.write('Accuracy: {:.2%} ({}/{})\n'.format(
+        s['acc'], s['correct'], s['total']))
+    if s['known_total'] or s['unk_total']:
+        out.write('Known Accuracy: {:.2%} ({}/{})\n'.format(
+            s['known_acc'], s['known_correct'], s['known_total']))
+        out.write('Unknown Accuracy: {:.2%} ({}/{})\n'.format(
+            s['unk_acc'], s['unk_correct'], s['unk_total']))
+    return out.getvalue()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--task', type=str, choices=['ws', 'pos'])
+    parser.add_argument('--ref-file', type=str)
+    parser.add_argument('--test-file', type=str)
+    parser.add_argument('--training-file', type=str, default=None)
+    parser.add_argument('--word-file', type=str, default=None)
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE)
+    # Abort on a mismatched line instead of skipping it.
+    parser.add_argument('--strict', action='store_true')
+    parser.add_argument('--output-file', type=str, default='stdout')
+    args = parser.parse_args()
+
+    if args.task == 'ws':
+        stats = grade_segmentation(args.ref_file, args.test_file,
+                                   args.block_size, args.strict)
+        result = format_segmentation(stats)
+    else:
+        vocab = None
+        if args.training_file is not None:
+            vocab = load_vocab(args.training_file)
+        stats = grade_tagging(args.ref_file, args.test_file, args.word_file,
+                              vocab, args.block_size)
+        result = format_tagging(stats)
+
+    # Print on the screen or save in the file.
+    if args.output_file == 'stdout':
+        print(result.strip())
+    else:
+        with open(args.output_file, 'w') as f:
+            f.write(result.strip())
@@ -0,0 +1,84 @@
+import io
+import json
+import time
+import asyncio
+import argparse
+try:  # Inside the `nlptut` package.
+    from .server import HOST, PORT, percentiles
+except ImportError:  # Run as a script.
+    from server import HOST, PORT, percentiles
+
+CONNECTIONS = 8
+REQUESTS = 1000
+
+async def run_connection(host, port, task, lines, n_requests, latencies):
+    """Send requests one after another on one connection, cycling over the
+    lines, and record the latency of each.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(n_requests):
+            request = {'task': task, 'text': lines[i % len(lines)]}
+            begin = time.perf_counter()
+            writer.write((json.dumps(request, ensure_ascii=False) + '\n')
+                         .encode('utf-8'))
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            if 'error' in response:
+                raise RuntimeError(response['error'])
+            latencies.append((time.perf_counter() - begin) * 1000)
+    finally:
+        writer.close()
+
+async def request_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"task": "stats"}\n')
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    writer.close()
+    return response['result']
+
+async def load_client(host, port, task, test_file, connections, n_requests):
+    with open(test_file, 'r') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    latencies = []
+    per_connection = [n_requests // connections +
+                      (1 if i < n_requests % connections else 0)
+                      for i in range(connections)]
+    begin = time.perf_counter()
+    await asyncio.gather(*[run_connection(host, port, task, lines, n,
+                                          latencies)
+                           for n in per_connection])
+    elapsed = time.perf_counter() - begin
+    return latencies, elapsed, await request_stats(host, port)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', type=str, default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--task', type=str,
+                        choices=['segment', 'tag', 'classify'])
+    parser.add_argument('--test-file', type=str)
+    parser.add_argument('--connections', type=int, default=CONNECTIONS)
+    parser.add_argument('--requests', type=int, default=REQUESTS)
+    parser.add_argument('--output-file', type=str, default='stdout')
+    args = parser.parse_args()
+
+    latencies, elapsed, stats = asyncio.run(load_client(
+        args.host, args.port, args.task, args.test_file, args.connections,
+        args.requests))
+
+    # Write the report into a buffer.
+    out = io.StringIO()
+    out.write('Requests: {} in {:.2f}s ({:.1f} req/sec)\n'.format(
+        len(latencies), elapsed, len(latencies) / elapsed))
+    for name, value in percentiles(latencies).items():
+        out.write('Client latency {}: {:.2f}ms\n'.format(name, value))
+    out.write('Server stats: {}\n'.format(json.dumps(stats[args.task])))
+
+    # Print on the screen or save in the file.
+    if args.output_file == 'stdout':
+        print(out.getvalue().strip())
+    else:
+        with open(args.output_file, 'w') as f:
+            f.write(out.getvalue().strip())
@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+try:  # Inside the `nlptut` package.
+    from ..ws import word_segmentation
+    from ..hmm import test_hmm
+    from ..perceptron import test_perceptron, train_perceptron
+except ImportError:  # Run as a script.
+    EXERCISE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    for name in ['03-ws', '04-hmm', '05-perceptron']:
+        sys.path.append(os.path.join(EXERCISE, name))
+    import word_segmentation
+    import test_hmm
+    import test_perceptron
+    import train_perceptron
+
+HOST = '127.0.0.1'
+PORT = 8750
+WINDOW = 0.005  # Seconds to wait for more requests to join a batch.
+MAX_BATCH = 64
+LATENCIES = 10000  # Latencies kept per task for the percentiles.
+TASKS = ['segment', 'tag', 'classify']
+
+# The models of this process, loaded once by `load_models()`.
+MODELS = {}
+
+def load_models(ws_model_file=None, hmm_model_file=None,
+                perceptron_model_file=None):
+    """Load each given model once, in the process running the batches
+    (every worker of the process pool).
+    """
+    if ws_model_file is not None:
+        probs_uni = word_segmentation.load_model(ws_model_file)
+        MODELS['segment'] = (probs_uni,
+                             word_segmentation.make_scorer(probs_uni))
+    if hmm_model_file is not None:
+        transition, emission, possible_tags = \
+            test_hmm.load_model(hmm_model_file)
+        MODELS['tag'] = (transition, emission, possible_tags,
+                         test_hmm.make_scorers(transition, emission))
+    if perceptron_model_file is not None:
+        MODELS['classify'] = test_perceptron.load_model(perceptron_model_file)
+
+def run_one(task, line):
+    """Run the existing `forward()`/`predict_one()` logic on one line.
+    """
+    if task == 'segment':
+        probs_uni, scorer = MODELS[task]
+        line = line.strip()
+        best_edge = word_segmentation.forward(probs_uni, line, scorer)
+        return ' '.join(word_segmentation.backward(best_edge, line))
+    elif task == 'tag':
+        transition, emission, possible_tags, scorers = MODELS[task]
+        best_edge = test_hmm.forward(transition, emission, possible_tags,
+                                     line, scorers)
+        return ' '.join(test_hmm.backward(best_edge, line))
+    elif task == 'classify':
+        phi = train_perceptron.create_features(line)
+        return train_perceptron.predict_one(MODELS[task], phi)
+
+def run_batch(task, lines):
+    """Run a batch of lines, each on its own, so a bad line only fails its
+    own request and not the others batched with it.
+
+    Returns:
+        The <list> of results, one per line, or the exception raised by
+        the line.
+    """
+    results = []
+    for line in lines:
+        try:
+            results.append(run_one(task, line))
+        except Exception as e:
+            results.append(e)
+    return results
+
+def percentiles(values, points=(50, 90, 99)):
+    """Nearest-rank percentiles of a list of numbers.
+    """
+    values = sorted(values)
+    if not values:
+        return {'p{}'.format(p): None for p in points}
+    return {'p{}'.format(p):
+            values[min(len(values) - 1, int(len(values) * p / 100))]
+            for p in points}
+
+class Batcher(object):
+    """Collect the concurrent requests of one task into micro-batches.
+    A batch starts with the first waiting request and takes the requests
+    arriving within `window` seconds, up to `max_batch` of them, then it is
+    run in the executor.
+    """
+
+    def __init__(self, task, executor, window=WINDOW, max_batch=MAX_BATCH,
+                 concurrency=1):
+        self.task = task
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.slots = asyncio.Semaphore(concurrency)  # Batches run at once.
+        self.queue = asyncio.Queue()
+        self.in_flight = 0
+        self.batches = 0
+        self.requests = 0
+        self.latencies = deque(maxlen=LATENCIES)
+
+    async def submit(self, line):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((line, future, time.perf_counter()))
+        return await future
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            # Let the concurrent requests arrive, then take what is waiting.
+            if self.window > 0 and self.queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self.slots.acquire()
+            asyncio.ensure_future(self.dispatch(batch))
+
+    async def dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        self.in_flight += len(batch)
+        try:
+            results = await loop.run_in_executor(
+                self.executor, run_batch, self.task,
+                [line for line, _, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            self.in_flight -= len(batch)
+            self.slots.release()
+        self.batches += 1
+        now = time.perf_counter()
+        for (_, future, begin), result in zip(batch, results):
+            self.requests += 1
+            self.latencies.append((now - begin) * 1000)
+            if future.cancelled():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        stats = {'queue_depth': self.queue.qsize(),
+                 'in_flight': self.in_flight,
+                 'requests': self.requests,
+                 'batches': self.batches,
+                 'mean_batch': (self.requests / self.batches
+                                if self.batches else 0.)}
+        stats.update({'latency_ms_' + k: v for k, v in
+                      percentiles(self.latencies).items()})
+        return stats
+
+class Server(object):
+    """Serve one JSON object per line over a local TCP socket.
+
+    Requests are `{"task": "segment"|"tag"|"classify", "text": LINE}` and are
+    answered with `{"result": ...}` (or `{"error": ...}`), in order. The
+    request `{"task": "stats"}` returns the latency percentiles and the
+    queue depth of every task. An optional `"id"` is echoed back, also with
+    an error.
+    """
+
+    def __init__(self, executor, tasks, window=WINDOW, max_batch=MAX_BATCH,
+                 concurrency=1):
+        self.batchers = {task: Batcher(task, executor, window, max_batch,
+                                       concurrency)
+                         for task in tasks}
+
+    def stats(self):
+        return {task: b.stats() for task, b in self.batchers.items()}
+
+    async def answer(self, request):
+        echo = {}  # The request "id", also on errors.
+        try:
+            request = json.loads(request)
+            if not isinstance(request, dict):
+                raise ValueError('the request must be a JSON object')
+            if 'id' in request:
+                echo['id'] = request['id']
+            task = request.get('task')
+            if task == 'stats':
+                response = {'result': self.stats()}
+            elif task not in self.batchers:
+                response = {'error': 'unknown task: {}'.format(task)}
+            elif not isinstance(request.get('text'), str):
+                # Rejected before it can join (and fail) a batch.
+                response = {'error': '"text" must be a string'}
+            elif task == 'tag' and not request['text'].strip():
+                response = {'error': '"text" must not be empty'}
+            else:
+                result = await self.batchers[task].submit(request['text'])
+                response = {'result': result}
+        except Exception as e:
+            response = {'error': '{}: {}'.format(type(e).__name__, e)}
+        response.update(echo)
+        return json.dumps(response, ensure_ascii=False) + '\n'
+
+    async def handle(self, reader, writer):
+        # Answer the pipelined requests concurrently, but write in order.
+        pending = asyncio.Queue()
+
+        async def write_responses():
+            while True:
+                task = await pending.get()
+                if task is None:
+                    break
+                writer.write((await task).encode('utf-8'))
+                await writer.drain()
+
+        writing = asyncio.ensure_future(write_responses())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode('utf-8').strip()
+                if line:
+                    await pending.put(asyncio.ensure_future(self.answer(line)))
+        finally:
+            await pending.put(None)
+            await writing
+            writer.close()
+
+    async def serve(self, host, port):
+        for batcher in self.batchers.values():
+            asyncio.ensure_future(batcher.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ws-model-file', type=str, default=None)
+    parser.add_argument('--hmm-model-file', type=str, default=None)
+    parser.add_argument('--perceptron-model-file', type=str, default=None)
+    parser.add_argument('--host', type=str, default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--window', type=float, default=WINDOW)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    # 0 runs the batches in a thread of this process.
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    model_files = (args.ws_model_file, args.hmm_model_file,
+                   args.perceptron_model_file)
+    tasks = [task for task, model_file in zip(TASKS, model_files)
+             if model_file is not None]
+    if args.workers > 0:
+        executor = ProcessPoolExecutor(args.workers, initializer=load_models,
+                                       initargs=model_files)
+    else:
+        load_models(*model_files)
+        executor = ThreadPoolExecutor(1)
+    server = Server(executor, tasks, args.window, args.max_batch,
+                    max(args.workers, 1))
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.shutdown()
+
+if __name__ == '__main__':
+    main()
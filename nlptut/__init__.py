@@ -0,0 +1,7 @@
+"""The exercises of the NLP Programming Tutorial as one package, with the
+`nlptut` command dispatching to them (see `nlptut.cli`, which is also run
+by `python -m nlptut` through `nlptut/__main__.py`).
+
+Nothing is imported here, so `import nlptut` stays cheap: every command
+imports only the exercise it runs.
+"""
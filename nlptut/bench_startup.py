@@ -0,0 +1,79 @@
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+EXERCISE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                        'exercise')
+REPEAT = 10
+
+def time_command(cmd, repeat, env=None, before=None):
+    """The median wall time of `repeat` runs of a command, in ms.
+    `before()` is called before each run (not timed).
+    """
+    times = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        begin = time.perf_counter()
+        subprocess.run(cmd, check=True, env=env, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(times)
+
+def bench_startup(model_file, test_file, output_file, repeat=REPEAT):
+    """Compare the start-up time of the `nlptut` command with the plain
+    interpreter and the script of the exercise, on a short segmentation job.
+    The cold runs parse the model file, the warm runs load its pickle.
+    """
+    from . import model_cache
+    env = dict(os.environ)
+    cache = tempfile.TemporaryDirectory()
+    env['NLPTUT_CACHE_DIR'] = cache.name
+    segment = [sys.executable, '-m', 'nlptut', 'segment',
+               '--model-file', model_file, '--test-file', test_file]
+
+    def clear_cache():
+        os.environ['NLPTUT_CACHE_DIR'] = cache.name
+        model_cache.clear()
+
+    runs = [
+        ('python -c pass', [sys.executable, '-c', 'pass'], None),
+        ('nlptut --help', [sys.executable, '-m', 'nlptut', '--help'], None),
+        ('word_segmentation.py',
+         [sys.executable,
+          os.path.join(EXERCISE, '03-ws', 'word_segmentation.py'),
+          '--model-file', model_file, '--test-file', test_file], None),
+        ('nlptut segment --no-cache', segment + ['--no-cache'], None),
+        ('nlptut segment (cold)', segment, clear_cache),
+        ('nlptut segment (warm)', segment, None),
+    ]
+
+    # Write the report into a buffer.
+    out = io.StringIO()
+    out.write('command\tmedian_ms\n')
+    with cache:
+        for name, cmd, before in runs:
+            out.write('{}\t{:.1f}\n'.format(
+                name, time_command(cmd, repeat, env, before)))
+
+    # Print on the screen or save in the file.
+    if output_file == 'stdout':
+        print(out.getvalue().strip())
+    else:
+        with open(output_file, 'w') as f:
+            f.write(out.getvalue().strip())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model-file', type=str)
+    parser.add_argument('--test-file', type=str)
+    parser.add_argument('--output-file', type=str, default='stdout')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    bench_startup(args.model_file, args.test_file, args.output_file,
+                  args.repeat)
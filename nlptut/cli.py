@@ -0,0 +1,83 @@
+import sys
+import runpy
+import argparse
+import importlib
+
+# The training commands run the scripts of the exercises with their own
+# options, e.g. `nlptut train-hmm --training-file ... --model-file ...`.
+TRAINERS = {
+    'train-unigram': 'nlptut.unigramlm.train_unigram',
+    'train-bigram': 'nlptut.bigramlm.train_bigram',
+    'train-hmm': 'nlptut.hmm.train_hmm',
+    'train-perceptron': 'nlptut.perceptron.train_perceptron',
+    'train-dep': 'nlptut.dep.train_dep',
+    'train-word2vec': 'nlptut.nn.train_word2vec',
+}
+
+def load_model(kind, module, model_file, use_cache):
+    # Imported here, so `nlptut --help` does not pay for pickle.
+    from . import model_cache
+    return model_cache.load(kind, model_file, module.load_model, use_cache)
+
+def segment(args):
+    ws = importlib.import_module('nlptut.ws.word_segmentation')
+    probs_uni = load_model('ws', ws, args.model_file, not args.no_cache)
+    ws.word_segmentation(probs_uni, args.test_file, args.output_file,
+                         args.cache_size)
+
+def tag(args):
+    hmm = importlib.import_module('nlptut.hmm.test_hmm')
+    model = load_model('hmm', hmm, args.model_file, not args.no_cache)
+    hmm.test_hmm(args.model_file, args.test_file, args.output_file,
+                 args.cache_size, model)
+
+def classify(args):
+    perceptron = importlib.import_module('nlptut.perceptron.test_perceptron')
+    w = load_model('perceptron', perceptron, args.model_file,
+                   not args.no_cache)
+    perceptron.test_perceptron(args.model_file, args.test_file,
+                               args.output_file, w)
+
+def train(name, argv):
+    """Run a training script as `__main__` with the given options.
+    """
+    sys.argv = [TRAINERS[name]] + argv
+    runpy.run_module(TRAINERS[name], run_name='__main__', alter_sys=True)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='nlptut', description='NLP Programming Tutorial exercises.')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.required = True
+    for name, func, help in [('segment', segment, 'Word segmentation.'),
+                             ('tag', tag, 'POS tagging with the HMM.'),
+                             ('classify', classify,
+                              'Classification with the perceptron.')]:
+        command = commands.add_parser(name, help=help)
+        command.add_argument('--model-file', type=str, required=True)
+        command.add_argument('--test-file', type=str, required=True)
+        command.add_argument('--output-file', type=str, default='stdout')
+        command.add_argument('--no-cache', action='store_true',
+                             help='Parse the model file even if it is cached.')
+        if name != 'classify':
+            # The same default as `common/score_cache.py`, kept here so the
+            # parser does not import it.
+            command.add_argument('--cache-size', type=int, default=1 << 16)
+        command.set_defaults(func=func)
+    for name, module in TRAINERS.items():
+        # Only listed in the help, `main()` runs them before parsing.
+        commands.add_parser(name, add_help=False, help='Run {}.py.'.format(
+            module.rsplit('.', 1)[-1]))
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # The options of a training command are those of its script.
+    if argv and argv[0] in TRAINERS:
+        train(argv[0], argv[1:])
+        return
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
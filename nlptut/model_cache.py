@@ -0,0 +1,66 @@
+import os
+import pickle
+import zlib
+
+# Where the parsed models are kept, overridden by $NLPTUT_CACHE_DIR.
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'nlptut')
+
+def cache_dir():
+    return os.environ.get('NLPTUT_CACHE_DIR', CACHE_DIR)
+
+def cache_path(kind, model_file):
+    """The pickle file of a model, named after its kind and absolute path.
+    (`zlib` is much cheaper to import than `hashlib`, the path itself is
+    checked by `load()` in case of a collision.)
+    """
+    key = zlib.crc32(os.path.abspath(model_file).encode('utf-8'))
+    return os.path.join(cache_dir(), '{}-{:08x}.pickle'.format(kind, key))
+
+def load(kind, model_file, loader, use_cache=True):
+    """Load a model with `loader(model_file)`, or from its pickle if the
+    model file has not changed since (same path, mtime and size).
+    Parsing the text models is most of the start-up time of the short
+    commands, unpickling the parsed dicts is 2 to 8 times faster.
+
+    Args:
+        kind: <str> The kind of model, e.g. 'ws', 'hmm' or 'perceptron'.
+        model_file: <str> The file path of the text model.
+        loader: <callable> model_file -> model, must return a picklable model.
+        use_cache: <bool> False to always parse the model file.
+
+    Returns:
+        The model returned by `loader()`.
+    """
+    if not use_cache:
+        return loader(model_file)
+    st = os.stat(model_file)
+    stamp = (os.path.abspath(model_file), st.st_mtime_ns, st.st_size)
+    path = cache_path(kind, model_file)
+    try:
+        with open(path, 'rb') as f:
+            cached_stamp, model = pickle.load(f)
+        if cached_stamp == stamp:
+            return model
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass  # Missing or broken, parse the model again.
+    model = loader(model_file)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent jobs never read a partial pickle.
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((stamp, model), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # A read-only cache directory only costs the speed-up.
+    return model
+
+def clear():
+    """Remove all the cached models.
+    """
+    directory = cache_dir()
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith('.pickle'):
+            os.remove(os.path.join(directory, name))